@@ -0,0 +1,215 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+
+import orjson
+
+from authentication.auth import decode_access_token
+from observability.metrics import ADMISSION_QUEUE_WAIT, ADMISSION_REJECTED
+
+# Rutas que nunca se limitan: las sondas tienen que responder con la app saturada
+EXEMPT_PATHS = ("/health/", "/metrics")
+
+
+class ConcurrencyLimiter:
+    """Máximo de peticiones simultáneas con una cola acotada y un plazo de espera.
+
+    Al liberar un lugar se le pasa directamente al primero de la cola, así
+    una petición nueva no se adelanta a las que ya estaban esperando.
+    """
+
+    def __init__(self, limit, queue_size, timeout):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        """True si la petición puede pasar; False si la cola está llena o vence el plazo."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            # El lugar pudo llegar justo al vencer el plazo
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            # El cliente se fue justo cuando le pasaban el lugar: lo devolvemos
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class TokenBuckets:
+    """Un token bucket por clave (usuario o IP), con `rate` por segundo y ráfaga `burst`.
+
+    Se guardan a lo sumo `max_keys` claves; las menos usadas se descartan.
+    """
+
+    def __init__(self, rate, burst, max_keys=100_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def take(self, key):
+        """0 si hay token; si no, segundos hasta que haya uno."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+def route_class_for(method, path):
+    """Tipo de ruta antes de resolverla: mismo criterio que connect()."""
+    if path == "/token":
+        return "auth"
+    if method in ("GET", "HEAD"):
+        return "reads"
+    return "writes"
+
+
+def header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class AdmissionControlMiddleware:
+    """Protege el pool de la base frente a picos de tráfico.
+
+    Cada petición pasa primero por los token buckets de su usuario (token
+    Bearer) y de su IP, y responde 429 si se le acabaron. Después espera un
+    lugar en el limitador de su tipo de ruta (auth, reads, writes); si la cola
+    está llena o vence el plazo responde 503. Ambas respuestas llevan
+    Retry-After, así la app rechaza rápido en lugar de acumular peticiones
+    que terminarían en timeout.
+    """
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.limiters = {
+            route_class: ConcurrencyLimiter(
+                settings[route_class].concurrency,
+                settings[route_class].queue,
+                settings[route_class].timeout,
+            )
+            for route_class in ("auth", "reads", "writes")
+        }
+        self.user_buckets = TokenBuckets(settings.user_rate, settings.user_burst)
+        self.ip_buckets = (
+            TokenBuckets(settings.ip_rate, settings.ip_burst) if settings.ip_rate > 0 else None
+        )
+        self.trusted_proxies = settings.trusted_proxies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = route_class_for(scope["method"], scope["path"])
+        wait = self.rate_limit_wait(scope)
+        if wait:
+            ADMISSION_REJECTED.labels(route_class, "rate_limited").inc()
+            await reject(send, 429, "Too many requests", wait)
+            return
+
+        limiter = self.limiters[route_class]
+        start = time.perf_counter()
+        admitted = await limiter.acquire()
+        ADMISSION_QUEUE_WAIT.labels(route_class).observe(time.perf_counter() - start)
+        if not admitted:
+            ADMISSION_REJECTED.labels(route_class, "saturated").inc()
+            await reject(send, 503, "Service overloaded", limiter.timeout)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def rate_limit_wait(self, scope):
+        """0 si la petición pasa; si no, segundos hasta que pueda pasar.
+
+        Con un token válido se cobra al bucket de su usuario (sub); un token
+        inventado no abre un bucket nuevo, se trata como una petición sin
+        token. Si un bucket rechaza la petición, no se le cobra al otro.
+        """
+        user = self.token_subject(scope)
+        if user is not None:
+            wait = self.user_buckets.take(user)
+            if wait:
+                return wait
+        if self.ip_buckets is not None:
+            ip = self.client_ip(scope)
+            if ip:
+                return self.ip_buckets.take(ip)
+        return 0.0
+
+    def token_subject(self, scope):
+        authorization = header(scope, b"authorization")
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return None
+        # Verificar la firma HS256 es barato comparado con lo que protege
+        payload = decode_access_token(authorization[7:])
+        return payload.get("sub") if payload else None
+
+    def client_ip(self, scope):
+        """IP del cliente: el salto de X-Forwarded-For que agregó el primer proxy
+        de confianza, o la del socket si no hay proxies configurados."""
+        if self.trusted_proxies:
+            forwarded = header(scope, b"x-forwarded-for")
+            hops = [hop.strip() for hop in forwarded.split(",")] if forwarded else []
+            # Los saltos de la izquierda los escribe el cliente: no son confiables
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        client = scope.get("client")
+        return client[0] if client else None
+
+
+async def reject(send, status_code, detail, retry_after):
+    body = orjson.dumps({"detail": detail})
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -1,28 +1,43 @@
 # Función para crear una conexión a la base de datos
 from datetime import datetime, timedelta
-import os
-from fastapi import Depends
-import jwt
-import psycopg2
-from passlib.context import CryptContext
+from functools import lru_cache
 
 # Configuración de seguridad
 SECRET_KEY = "your-secret-key"  # Cambia esto por una clave secreta segura
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# passlib, bcrypt y PyJWT (con cryptography) tardan en importarse: se cargan
+# con la primera petición que los necesita y no al arrancar la app
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 
 # Función para verificar y crear contraseñas
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 # Función para generar tokens
 def create_access_token(data: dict, expires_delta: timedelta = None):
+    import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+# Función para leer tokens: devuelve el payload o None si no es válido
+def decode_access_token(token: str):
+    import jwt
+
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
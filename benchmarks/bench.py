@@ -0,0 +1,370 @@
+"""Benchmarks de los endpoints con perfiles de carga sintéticos.
+
+Levanta la app de main.py en proceso (sin red) contra la base de DB_URL,
+siembra un dataset sintético y ejecuta uno o varios perfiles de carga. Por
+cada ruta reporta throughput, latencias p50/p95/p99 y consultas por
+petición, en JSON para comparar corridas entre commits.
+
+Desde la raíz del repositorio:
+    DB_URL=sqlite:////tmp/bench.db python -m benchmarks.bench run --output base.json
+    python -m benchmarks.bench compare base.json head.json
+"""
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+import typer
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+# Todo el benchmark sale de una sola IP: sin esto admission control lo
+# limitaría. Con MEDELLIN_ADMISSION__ENABLED=true se mide la app bajo sobrecarga
+os.environ.setdefault("MEDELLIN_ADMISSION__ENABLED", "false")
+
+from main import app
+from authentication.auth import get_password_hash
+from db.database import Base, engine
+from UserEventEnum.UserEventEnum import UserEventEnum
+
+# Los routers no importan los modelos; con SQLite las tablas salen de create_all
+import buildings.build  # noqa: F401
+import celebrations.celebration  # noqa: F401
+import characters.character  # noqa: F401
+import daily_login_bonus.daily_login_bonus  # noqa: F401
+import missions.mission  # noqa: F401
+import missions.mission_progress  # noqa: F401
+import user_events.user_events  # noqa: F401
+import user_resources.user_resources  # noqa: F401
+
+app_cli = typer.Typer()
+
+BENCH_PASSWORD = "bench-password"
+SEARCH_TERMS = ("torre", "gran", "cas", "fiesta", "heroe", "mision")
+
+
+# DATASET
+def user_id(index):
+    return f"bench-{index}"
+
+
+def seed(users, catalog, rng):
+    """Siembra usuarios y catálogo sintéticos, solo si no existen todavía."""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as con:
+        exists = con.execute(
+            text("SELECT 1 FROM users WHERE id = :id"), {"id": user_id(0)}
+        ).first()
+        if exists:
+            return
+
+        password = get_password_hash(BENCH_PASSWORD)
+        yesterday = date.today() - timedelta(days=1)
+        con.execute(
+            text(
+                "INSERT INTO users (id, name, email, password, registerdatetime) "
+                "VALUES (:id, :name, :email, :password, :registerdatetime)"
+            ),
+            [
+                {
+                    "id": user_id(i),
+                    "name": f"Bench {i}",
+                    "email": f"bench-{i}@example.com",
+                    "password": password,
+                    "registerdatetime": datetime.now(timezone.utc).isoformat(),
+                }
+                for i in range(users)
+            ],
+        )
+        con.execute(
+            text(
+                "INSERT INTO user_resources (user_id, food, gold, wood, stone, experience) "
+                "VALUES (:user_id, :food, :gold, :wood, :stone, :experience)"
+            ),
+            [
+                {
+                    "user_id": user_id(i),
+                    "food": rng.randint(0, 5000),
+                    "gold": rng.randint(0, 5000),
+                    "wood": rng.randint(0, 5000),
+                    "stone": rng.randint(0, 5000),
+                    "experience": rng.randint(0, 100),
+                }
+                for i in range(users)
+            ],
+        )
+        # La mayoría de los usuarios vienen con racha del día anterior
+        con.execute(
+            text(
+                "INSERT INTO daily_login_bonus (user_id, last_login_date, streak) "
+                "VALUES (:user_id, :last_login_date, :streak)"
+            ),
+            [
+                {"user_id": user_id(i), "last_login_date": yesterday, "streak": rng.randint(1, 30)}
+                for i in range(users)
+                if rng.random() < 0.8
+            ],
+        )
+
+        names = ("Torre", "Granja", "Castillo", "Mercado", "Muralla", "Templo")
+        con.execute(
+            text(
+                "INSERT INTO buildings (name, description, cost, preview_build, experience_require) "
+                "VALUES (:name, :description, :cost, :preview_build, :experience_require)"
+            ),
+            [
+                {
+                    "name": f"{rng.choice(names)} {i}",
+                    "description": "Gran edificio de la aldea",
+                    "cost": rng.randint(10, 5000),
+                    "preview_build": f"build-{i}.png",
+                    "experience_require": rng.randint(0, 100),
+                }
+                for i in range(catalog)
+            ],
+        )
+        con.execute(
+            text("INSERT INTO characters (name, description) VALUES (:name, :description)"),
+            [{"name": f"Heroe {i}", "description": "Personaje de la aldea"} for i in range(catalog)],
+        )
+        events = list(UserEventEnum)
+        con.execute(
+            text(
+                "INSERT INTO missions (name, description, event_name, target_count, "
+                "reward_food, reward_gold, reward_wood, reward_stone, reward_experience) "
+                "VALUES (:name, :description, :event_name, :target_count, "
+                ":reward, :reward, :reward, :reward, :reward)"
+            ),
+            [
+                {
+                    "name": f"Mision {i}",
+                    "description": "Mision diaria",
+                    "event_name": events[i % len(events)].value,
+                    "target_count": rng.randint(1, 20),
+                    "reward": rng.randint(1, 100),
+                }
+                for i in range(catalog)
+            ],
+        )
+        con.execute(
+            text("INSERT INTO celebrations (name, description, date) VALUES (:name, :description, :date)"),
+            [
+                {
+                    "name": f"Fiesta {i}",
+                    "description": "Celebración de la aldea",
+                    "date": date.today() + timedelta(days=i),
+                }
+                for i in range(catalog)
+            ],
+        )
+
+
+# PERFILES
+# Cada perfil genera (method, route, url, kwargs); route es la plantilla con la
+# que MetricsMiddleware etiqueta la petición
+def login_storm(users, rng):
+    while True:
+        i = rng.randrange(users)
+        yield "POST", "/token", "/token", {
+            "data": {"username": f"bench-{i}@example.com", "password": BENCH_PASSWORD}
+        }
+
+
+def event_firehose(users, rng):
+    events = [event.value for event in UserEventEnum]
+    # Unos pocos eventos concentran la mayor parte del tráfico
+    weights = [1 / (rank + 1) for rank in range(len(events))]
+    while True:
+        yield "POST", "/user-events/", "/user-events/", {
+            "json": {
+                "user_id": user_id(rng.randrange(users)),
+                "event_name": rng.choices(events, weights)[0],
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        }
+
+
+def daily_bonus_peak(users, rng):
+    # Cada usuario reclama una sola vez, en orden aleatorio
+    order = list(range(users))
+    rng.shuffle(order)
+    for i in order:
+        yield "POST", "/daily-login-bonus/", "/daily-login-bonus/", {
+            "params": {"user_id": user_id(i)}
+        }
+
+
+def catalog_boot(users, rng):
+    # Lo que pide el cliente al abrir el juego
+    while True:
+        uid = user_id(rng.randrange(users))
+        yield "GET", "/buildings", "/buildings", {"params": {"limit": 50}}
+        yield "GET", "/characters", "/characters", {}
+        yield "GET", "/missions", "/missions", {}
+        yield "GET", "/celebrations", "/celebrations", {}
+        yield "GET", "/users/{user_id}/missions", f"/users/{uid}/missions", {}
+        yield "GET", "/users/{user_id}/buildings/available", f"/users/{uid}/buildings/available", {}
+        yield "GET", "/catalog/search", "/catalog/search", {"params": {"q": rng.choice(SEARCH_TERMS)}}
+
+
+PROFILES = {
+    "login_storm": login_storm,
+    "event_firehose": event_firehose,
+    "daily_bonus_peak": daily_bonus_peak,
+    "catalog_boot": catalog_boot,
+}
+
+
+# EJECUCIÓN
+def db_queries(method, route):
+    labels = {"method": method, "route": route}
+    total = REGISTRY.get_sample_value("http_request_db_queries_sum", labels) or 0.0
+    count = REGISTRY.get_sample_value("http_request_db_queries_count", labels) or 0.0
+    return total, count
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+async def run_profile(client, name, requests, concurrency, users, rng):
+    # Un solo generador compartido: entre todos los workers se hacen `requests` peticiones
+    operations = (operation for _, operation in zip(range(requests), PROFILES[name](users, rng)))
+    samples = {}
+
+    async def worker():
+        for method, route, url, kwargs in operations:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - start
+            route_samples = samples.setdefault((method, route), {"latencies": [], "statuses": {}})
+            route_samples["latencies"].append(elapsed)
+            statuses = route_samples["statuses"]
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    queries_before = {key: db_queries(*key) for key in _route_keys(name, users)}
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    routes = {}
+    for (method, route), route_samples in sorted(samples.items()):
+        latencies = sorted(route_samples["latencies"])
+        total_before, count_before = queries_before.get((method, route), (0.0, 0.0))
+        total_after, count_after = db_queries(method, route)
+        measured = count_after - count_before
+        routes[f"{method} {route}"] = {
+            "requests": len(latencies),
+            "statuses": {str(code): count for code, count in sorted(route_samples["statuses"].items())},
+            "throughput_rps": round(len(latencies) / wall_time, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "queries_per_request": round((total_after - total_before) / measured, 2)
+            if measured
+            else None,
+        }
+    return {
+        "requests": sum(route["requests"] for route in routes.values()),
+        "wall_time_s": round(wall_time, 3),
+        "routes": routes,
+    }
+
+
+def _route_keys(name, users):
+    """Rutas que toca un perfil, tomadas de las primeras operaciones que genera."""
+    keys = set()
+    for _, (method, route, _, _) in zip(range(50), PROFILES[name](users, random.Random(0))):
+        keys.add((method, route))
+    return keys
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_all(profiles, requests, concurrency, users, seed_value):
+    rng = random.Random(seed_value)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    # lifespan_context ejecuta el arranque y el cierre de la app como en uvicorn
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in profiles:
+                results[name] = await run_profile(client, name, requests, concurrency, users, rng)
+    return results
+
+
+@app_cli.command("run")
+def run(
+    profile: List[str] = typer.Option(list(PROFILES), help="Perfiles a ejecutar"),
+    requests: int = typer.Option(2000, help="Peticiones por perfil"),
+    concurrency: int = typer.Option(20, help="Peticiones simultáneas"),
+    users: int = typer.Option(1000, help="Usuarios sintéticos"),
+    catalog: int = typer.Option(200, help="Items por tabla del catálogo"),
+    seed_value: int = typer.Option(42, "--seed", help="Semilla del dataset y de la carga"),
+    output: Optional[Path] = typer.Option(None, help="Archivo JSON de salida"),
+):
+    unknown = [name for name in profile if name not in PROFILES]
+    if unknown:
+        raise typer.BadParameter(f"Unknown profiles {unknown}, use: {', '.join(PROFILES)}")
+
+    seed(users, catalog, random.Random(seed_value))
+    results = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "database": engine.dialect.name,
+        "python": platform.python_version(),
+        "config": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "users": users,
+            "catalog": catalog,
+            "seed": seed_value,
+        },
+        "profiles": asyncio.run(run_all(profile, requests, concurrency, users, seed_value)),
+    }
+
+    report = json.dumps(results, indent=2)
+    if output is None:
+        typer.echo(report)
+    else:
+        output.write_text(report + "\n", encoding="utf-8")
+
+
+@app_cli.command("compare")
+def compare(base: Path, head: Path):
+    """Diferencia de p95 y consultas por petición entre dos corridas."""
+    base_results = json.loads(base.read_text(encoding="utf-8"))["profiles"]
+    head_results = json.loads(head.read_text(encoding="utf-8"))["profiles"]
+    for name, profile in head_results.items():
+        for route, stats in profile["routes"].items():
+            before = base_results.get(name, {}).get("routes", {}).get(route)
+            if before is None:
+                continue
+            change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            typer.echo(
+                f"{name:18} {route:45} p95 {before['p95_ms']:9.3f} -> {stats['p95_ms']:9.3f} ms "
+                f"({change:+6.1f}%)  queries {before['queries_per_request']} -> "
+                f"{stats['queries_per_request']}"
+            )
+
+
+if __name__ == "__main__":
+    app_cli()
@@ -1,5 +1,5 @@
 from db.database import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, DateTime, func
 
 class Build(Base):
     __tablename__ = "buildings"
@@ -9,4 +9,12 @@ class Build(Base):
     description = Column(String,nullable=False)
     cost = Column(Integer,nullable=False)
     preview_build = Column(String,nullable=False)
-    experience_require = Column(Integer,nullable=False)
\ No newline at end of file
+    experience_require = Column(Integer,nullable=False)
+    # Lo actualiza un trigger en cada UPDATE; de aquí salen ETag y Last-Modified
+    updated_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
+
+    # Índices para los filtros y la paginación por cursor de GET /buildings
+    __table_args__ = (
+        Index("ix_buildings_cost_id", "cost", "id"),
+        Index("ix_buildings_experience_require_id", "experience_require", "id"),
+    )
@@ -0,0 +1,79 @@
+import threading
+from bisect import bisect_right
+
+from cache.catalog_cache import catalog_cache
+from db.database import connect
+from db.statements import statements
+
+
+class BuildingIndex:
+    """Snapshot en memoria de buildings ordenado por experience_require y cost.
+
+    Los edificios se agrupan por nivel de experiencia y cada grupo se ordena
+    por costo, así las consultas bisecan en lugar de recorrer el catálogo.
+    """
+
+    def __init__(self, rows):
+        levels = {}
+        for row in rows:
+            levels.setdefault(row["experience_require"], []).append(row)
+
+        self.levels = sorted(levels)
+        self.rows_by_level = []
+        self.costs_by_level = []
+        for level in self.levels:
+            bucket = sorted(levels[level], key=lambda row: (row["cost"], row["id"]))
+            self.rows_by_level.append(bucket)
+            self.costs_by_level.append([row["cost"] for row in bucket])
+
+    def available(self, experience, gold):
+        """Edificios desbloqueados (experience_require <= experience) y pagables (cost <= gold)."""
+        unlocked = bisect_right(self.levels, experience)
+        result = []
+        for level in range(unlocked):
+            affordable = bisect_right(self.costs_by_level[level], gold)
+            result.extend(self.rows_by_level[level][:affordable])
+        return result
+
+
+class BuildingIndexHolder:
+    """Construye el índice bajo demanda y lo descarta cuando cambia el catálogo."""
+
+    def __init__(self):
+        self._index = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    async def get(self):
+        with self._lock:
+            if self._index is not None:
+                return self._index
+            version = self._version
+
+        index = BuildingIndex(await load_buildings())
+
+        with self._lock:
+            # Si se invalidó mientras cargábamos, usamos el índice solo para esta petición
+            if version == self._version:
+                self._index = index
+        return index
+
+    def invalidate(self, table, item_id=None, op=None):
+        if table != "buildings":
+            return
+        with self._lock:
+            self._version += 1
+            self._index = None
+
+
+statements.register("buildings.snapshot", "SELECT * FROM buildings")
+
+
+async def load_buildings():
+    async with connect("reads") as con:
+        result = await statements.execute(con, "buildings.snapshot")
+        return [dict(row._mapping) for row in result]
+
+
+building_index = BuildingIndexHolder()
+catalog_cache.subscribe(building_index.invalidate)
@@ -0,0 +1,101 @@
+import json
+import threading
+
+from db.notifications import notification_listener
+from db.statements import statements
+
+# Canal de Postgres por el que se difunden las invalidaciones del catálogo
+INVALIDATION_CHANNEL = "catalog_invalidation"
+CATALOG_TABLES = ("buildings", "characters", "missions", "celebrations")
+
+statements.register("catalog.notify", "SELECT pg_notify(:channel, :payload)")
+
+
+class CatalogCache:
+    """Cache en memoria, por proceso, de los items del catálogo por (tabla, id)."""
+
+    def __init__(self):
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    async def get(self, table, item_id, loader):
+        """Devuelve el item cacheado o lo carga con la corrutina `loader` (read-through)."""
+        key = (table, item_id)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            generation = self._generation
+
+        row = await loader()
+
+        # Si hubo una invalidación mientras cargábamos, no guardamos la fila:
+        # podría ser anterior al cambio que provocó la invalidación.
+        if row is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = row
+        return row
+
+    def invalidate(self, table, item_id=None):
+        with self._lock:
+            self._generation += 1
+            if item_id is None:
+                for key in [key for key in self._entries if key[0] == table]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((table, item_id), None)
+
+    def clear(self):
+        """Vacía la cache y avisa a los suscriptores que recarguen cada tabla."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        for table in CATALOG_TABLES:
+            for callback in self._subscribers:
+                callback(table, None, "reset")
+
+    def subscribe(self, callback):
+        """Registra `callback(table, item_id, op)` para cada invalidación recibida."""
+        self._subscribers.append(callback)
+
+    def publish(self, table, item_id, op):
+        self.invalidate(table, item_id)
+        for callback in self._subscribers:
+            callback(table, item_id, op)
+
+    def handle_notification(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("table") not in CATALOG_TABLES:
+            return
+        self.publish(message["table"], message.get("id"), message.get("op"))
+
+
+catalog_cache = CatalogCache()
+
+
+async def notify_invalidation(con, table, item_id, op):
+    """Encola la invalidación en la transacción de `con`.
+
+    NOTIFY es transaccional: los demás workers solo la reciben si la
+    transacción hace commit.
+    """
+    if con.dialect.name != "postgresql":
+        # Sin LISTEN/NOTIFY (SQLite en desarrollo) alcanza con el publish local
+        # que hace la ruta después del commit
+        return
+    payload = json.dumps({"table": table, "id": item_id, "op": op})
+    await statements.execute(
+        con, "catalog.notify", {"channel": INVALIDATION_CHANNEL, "payload": payload}
+    )
+
+
+# Las invalidaciones de cualquier worker llegan por LISTEN; al reconectar se
+# vacían la cache y los índices suscriptos porque pudimos perder mensajes
+notification_listener.subscribe(
+    INVALIDATION_CHANNEL, catalog_cache.handle_notification, catalog_cache.clear
+)
@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response, status
+
+import db.table_version  # noqa: F401  (create_all crea table_versions)
+from db.statements import statements
+
+statements.register(
+    "http_cache.table_version",
+    "SELECT version, updated_at FROM table_versions WHERE table_name = :table",
+)
+
+
+class Validators:
+    """ETag y Last-Modified de un recurso, calculados sin serializar el cuerpo."""
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self):
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def matches(self, request):
+        """True si el cliente ya tiene esta versión (If-None-Match o If-Modified-Since)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Comparación débil: el cuerpo comprimido o no es la misma versión
+            tags = {strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+            return "*" in tags or strip_weak(self.etag) in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified tiene precisión de segundos
+        return self.last_modified.replace(microsecond=0) <= since
+
+    def not_modified(self):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+
+def strip_weak(tag):
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def to_datetime(value):
+    """updated_at llega como datetime (asyncpg) o como texto (SQLite)."""
+    if value is None or isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(str(value))
+    if moment is not None and moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+async def table_validators(con, table):
+    """Validadores de un listado completo a partir de table_versions.
+
+    Sin fila para la tabla (base sin la migración 004, como SQLite en
+    desarrollo) devuelve None y el listado se sirve sin validadores.
+    """
+    row = (
+        await statements.execute(con, "http_cache.table_version", {"table": table})
+    ).fetchone()
+    if row is None:
+        return None
+    return Validators(f'W/"{table}-{row.version}"', to_datetime(row.updated_at))
+
+
+def row_validators(kind, row):
+    """Validadores de un recurso individual a partir de su id y updated_at."""
+    updated_at = to_datetime(getattr(row, "updated_at", None))
+    if updated_at is None:
+        return None
+    return Validators(f'W/"{kind}-{row.id}-{updated_at.timestamp()}"', updated_at)
+
+
+def cache_headers(validators, headers=None):
+    """`headers` más los de `validators`, si hay."""
+    headers = dict(headers or {})
+    if validators is not None:
+        headers.update(validators.headers)
+    return headers
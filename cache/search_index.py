@@ -0,0 +1,225 @@
+import asyncio
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from sqlalchemy import bindparam, text
+
+from cache.catalog_cache import CATALOG_TABLES, catalog_cache
+from db.database import connect
+from db.statements import statements
+
+TOKEN_RE = re.compile(r"\w+")
+
+# El nombre pesa más que la descripción al ordenar los resultados
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+EXACT_MATCH_BONUS = 1.5
+
+
+# Carga completa y por ids de cada tabla del catálogo
+for catalog_table in CATALOG_TABLES:
+    statements.register(
+        f"search.load.{catalog_table}",
+        f"SELECT id, name, description FROM {catalog_table}",
+    )
+    statements.register(
+        f"search.load_ids.{catalog_table}",
+        text(
+            f"SELECT id, name, description FROM {catalog_table} WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+    )
+
+
+def tokenize(value):
+    """Minúsculas, sin tildes y separado en palabras."""
+    normalized = unicodedata.normalize("NFKD", value or "").lower()
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    return TOKEN_RE.findall(normalized)
+
+
+class CatalogSearchIndex:
+    """Índice invertido en memoria sobre name y description del catálogo.
+
+    Cada token apunta a los items que lo contienen con su peso. El vocabulario
+    se mantiene ordenado para resolver búsquedas por prefijo con bisección.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._documents = {}
+        self._loaded = False
+        self._started = False
+        self._pending = {}
+        self._refreshing = None
+        self._lock = threading.RLock()
+
+    def add(self, table, row):
+        key = (table, row["id"])
+        weights = {}
+        for token in tokenize(row["name"]):
+            weights[token] = weights.get(token, 0.0) + NAME_WEIGHT
+        for token in tokenize(row["description"]):
+            weights[token] = weights.get(token, 0.0) + DESCRIPTION_WEIGHT
+
+        with self._lock:
+            self._remove(key)
+            self._documents[key] = (row["name"], row["description"], tuple(weights))
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    insort(self._vocabulary, token)
+                postings[key] = weight
+
+    def remove(self, table, item_id):
+        with self._lock:
+            self._remove((table, item_id))
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for token in document[2]:
+            postings = self._postings[token]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _expand(self, term):
+        """Tokens del vocabulario que empiezan por `term`."""
+        start = bisect_left(self._vocabulary, term)
+        end = bisect_left(self._vocabulary, term + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    async def search(self, query, limit=20):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        await self.refresh()
+        with self._lock:
+            total = len(self._documents)
+            scores = None
+
+            # Empezamos por el término más selectivo y vamos intersectando
+            expansions = sorted(
+                ((term, self._expand(term)) for term in terms),
+                key=lambda expansion: len(expansion[1]),
+            )
+            for term, tokens in expansions:
+                term_scores = {}
+                for token in tokens:
+                    postings = self._postings[token]
+                    idf = math.log(1 + total / len(postings))
+                    bonus = EXACT_MATCH_BONUS if token == term else 1.0
+                    for key, weight in postings.items():
+                        if scores is not None and key not in scores:
+                            continue
+                        score = weight * idf * bonus
+                        if score > term_scores.get(key, 0.0):
+                            term_scores[key] = score
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: scores[key] + term_scores[key] for key in term_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [
+                {
+                    "type": table,
+                    "id": item_id,
+                    "name": self._documents[(table, item_id)][0],
+                    "description": self._documents[(table, item_id)][1],
+                    "score": round(score, 4),
+                }
+                for (table, item_id), score in ranked
+            ]
+
+    async def refresh(self):
+        """Carga el índice la primera vez y aplica los cambios pendientes.
+
+        Es lo único que consulta la base: la primera búsqueda y la primera
+        después de una invalidación leen las filas afectadas. Las búsquedas
+        que llegan mientras corre una carga esperan esa misma carga en lugar
+        de leer el catálogo cada una.
+        """
+        task = self._refreshing
+        if task is None or task.done():
+            task = self._refreshing = asyncio.ensure_future(self._refresh())
+        # Si el cliente que lanzó la carga se va, los demás la siguen esperando
+        await asyncio.shield(task)
+
+    async def _refresh(self):
+        with self._lock:
+            loaded = self._loaded
+            pending, self._pending = self._pending, {}
+            # Desde aquí se anotan los cambios que lleguen durante la carga
+            self._started = True
+
+        if not loaded:
+            tables = {table: None for table in CATALOG_TABLES}
+        else:
+            tables = {}
+            for (table, item_id), op in pending.items():
+                if item_id is None:
+                    tables[table] = None
+                elif tables.get(table, ()) is not None:
+                    tables.setdefault(table, {})[item_id] = op
+        if not tables:
+            return
+
+        try:
+            async with connect("reads") as con:
+                for table, changes in tables.items():
+                    if changes is None:
+                        result = await statements.execute(con, f"search.load.{table}")
+                        rows = [dict(row._mapping) for row in result]
+                        with self._lock:
+                            for key in [key for key in self._documents if key[0] == table]:
+                                self._remove(key)
+                            for row in rows:
+                                self.add(table, row)
+                        continue
+
+                    created = [item_id for item_id, op in changes.items() if op != "delete"]
+                    rows = []
+                    if created:
+                        result = await statements.execute(
+                            con, f"search.load_ids.{table}", {"ids": created}
+                        )
+                        rows = [dict(row._mapping) for row in result]
+                    with self._lock:
+                        for item_id in changes:
+                            self._remove((table, item_id))
+                        for row in rows:
+                            self.add(table, row)
+        except BaseException:
+            # Los cambios vuelven a la cola; los que llegaron durante la carga
+            # son más nuevos y tienen prioridad
+            with self._lock:
+                for key, op in pending.items():
+                    self._pending.setdefault(key, op)
+            raise
+
+        with self._lock:
+            self._loaded = True
+
+    def handle_invalidation(self, table, item_id=None, op=None):
+        """Anota el alta o baja; se aplica en la próxima búsqueda."""
+        with self._lock:
+            # Si todavía no se construyó, se cargará completo en la primera búsqueda
+            if not self._started:
+                return
+            self._pending[(table, item_id)] = op
+
+
+search_index = CatalogSearchIndex()
+catalog_cache.subscribe(search_index.handle_invalidation)
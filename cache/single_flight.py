@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from cache.catalog_cache import catalog_cache
+from config.settings import settings
+from observability.metrics import SINGLE_FLIGHT
+
+
+class SingleFlight:
+    """Junta las lecturas idénticas simultáneas en una sola consulta.
+
+    Las claves son tuplas (tipo, id, ...). La primera petición de una clave
+    lanza `loader` en su propia tarea y las que llegan mientras corre esperan
+    ese mismo resultado. Un resultado None (el 404) se recuerda `negative_ttl`
+    segundos, para como mucho `max_negative` claves.
+    """
+
+    def __init__(self, negative_ttl=0.0, max_negative=10_000):
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self._inflight = {}
+        # clave -> vencimiento; con un TTL fijo el orden de inserción es el de vencimiento
+        self._negative = OrderedDict()
+        self._generation = 0
+        # forget() llega también desde el hilo del listener de invalidaciones
+        self._lock = threading.Lock()
+
+    async def do(self, key, loader):
+        kind = key[0]
+        if self._known_missing(key):
+            SINGLE_FLIGHT.labels(kind, "negative_hit").inc()
+            return None
+
+        task = self._inflight.get(key)
+        if task is None:
+            SINGLE_FLIGHT.labels(kind, "leader").inc()
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT.labels(kind, "shared").inc()
+
+        # Si el cliente que lanzó la consulta se desconecta, los demás la siguen esperando
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        with self._lock:
+            generation = self._generation
+        result = await loader()
+        if result is None and self.negative_ttl > 0:
+            with self._lock:
+                # Si hubo un forget() mientras cargábamos, el 404 puede ser viejo
+                if generation == self._generation:
+                    self._remember_missing(key)
+        return result
+
+    def _finish(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Evita el aviso de excepción no leída si todos los que esperaban se fueron
+        if not task.cancelled():
+            task.exception()
+
+    def _known_missing(self, key):
+        with self._lock:
+            expires = self._negative.get(key)
+            if expires is None:
+                return False
+            if expires > time.monotonic():
+                return True
+            del self._negative[key]
+            return False
+
+    def _remember_missing(self, key):
+        now = time.monotonic()
+        self._negative.pop(key, None)
+        self._negative[key] = now + self.negative_ttl
+        # Primero los vencidos; si aun así sobran, los más viejos
+        while self._negative:
+            oldest, expires = next(iter(self._negative.items()))
+            if expires > now and len(self._negative) <= self.max_negative:
+                break
+            del self._negative[oldest]
+
+    def forget(self, kind, item_id=None):
+        """Olvida los 404 recordados de `kind` (solo los de `item_id` si se indica)."""
+        with self._lock:
+            self._generation += 1
+            for key in list(self._negative):
+                if key[0] == kind and (item_id is None or key[1] == item_id):
+                    del self._negative[key]
+
+
+single_flight = SingleFlight(
+    settings.single_flight.negative_ttl_seconds,
+    settings.single_flight.max_negative_entries,
+)
+
+# Un edificio (o cualquier item del catálogo) creado en este u otro worker ya no es 404
+catalog_cache.subscribe(lambda table, item_id, op: single_flight.forget(table, item_id))
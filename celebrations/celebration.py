@@ -1,5 +1,5 @@
 from db.database import Base
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, DateTime, func
 
 class Celebration(Base):
     __tablename__ = "celebrations"
@@ -7,4 +7,6 @@ class Celebration(Base):
     id = Column(Integer,primary_key=True,nullable=False,autoincrement=True)
     name = Column(String,nullable=False)
     description = Column(String,nullable=False)
-    date = Column(Date,nullable=False)
\ No newline at end of file
+    date = Column(Date,nullable=False)
+    # Lo actualiza un trigger en cada UPDATE; de aquí salen ETag y Last-Modified
+    updated_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
\ No newline at end of file
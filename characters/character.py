@@ -1,9 +1,11 @@
 from db.database import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, func
 
 class Character(Base):
     __tablename__ = "characters"
 
     id = Column(Integer,primary_key=True,nullable=False,autoincrement=True)
     name = Column(String,nullable=False)
-    description = Column(String,nullable=False)
\ No newline at end of file
+    description = Column(String,nullable=False)
+    # Lo actualiza un trigger en cada UPDATE; de aquí salen ETag y Last-Modified
+    updated_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
\ No newline at end of file
@@ -0,0 +1,147 @@
+import asyncio
+import csv
+import json
+import multiprocessing
+import random
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+import typer
+
+from authentication.auth import get_password_hash
+from cache.catalog_cache import catalog_cache
+from db.bulk import CATALOG_BULK_TABLES, BulkValidationError, bulk_insert, validate_items
+from db.database import async_engine, connect, engine
+from db.synthetic import generate_catalog, load_chunk
+from user_events.active_users import rebuild_from_events
+
+app = typer.Typer()
+
+
+@app.callback()
+def main():
+    """Herramientas de línea de comandos del servicio."""
+
+
+def load_items(path: Path):
+    """Lee los items de un archivo JSON (lista de objetos) o CSV con cabecera."""
+    with path.open(encoding="utf-8", newline="") as file:
+        if path.suffix.lower() == ".csv":
+            # Las celdas vacías se omiten para que apliquen los valores por defecto
+            return [
+                {key: value for key, value in row.items() if value != ""}
+                for row in csv.DictReader(file)
+            ]
+        items = json.load(file)
+    if not isinstance(items, list):
+        raise typer.BadParameter("The JSON file must contain a list of items")
+    return items
+
+
+# SEED CATALOG
+# Carga buildings, characters, missions o celebrations desde JSON/CSV con COPY
+# Ejemplo: python cli.py seed-catalog buildings buildings.csv
+@app.command("seed-catalog")
+def seed_catalog(table: str, path: Path):
+    if table not in CATALOG_BULK_TABLES:
+        raise typer.BadParameter(
+            f"Unknown table {table}, use one of: {', '.join(CATALOG_BULK_TABLES)}"
+        )
+
+    # Validamos todo el lote antes de abrir la transacción
+    try:
+        models = validate_items(table, load_items(path))
+    except BulkValidationError as e:
+        for error in e.errors:
+            typer.echo(f"item {error['index']}: {error['errors']}", err=True)
+        raise typer.Exit(code=1)
+
+    async def insert():
+        async with connect("bulk") as con:
+            ids = await bulk_insert(con, table, models)
+            await con.commit()
+        await async_engine.dispose()
+        return ids
+
+    ids = asyncio.run(insert())
+    catalog_cache.publish(table, None, "bulk")
+
+    typer.echo(json.dumps(ids))
+
+
+# GENERATE
+# Llena users, user_resources, user_events, daily_login_bonus y el catálogo con
+# datos sintéticos a escala de producción (solo PostgreSQL, usa COPY)
+# Ejemplo: python cli.py generate --users 1000000 --workers 8 --seed 7
+# La misma semilla y --as-of producen las mismas filas, con cualquier --workers
+@app.command("generate")
+def generate(
+    users: int = typer.Option(100_000, help="Usuarios a generar"),
+    events_per_user: float = typer.Option(20.0, help="Eventos promedio por usuario"),
+    catalog: int = typer.Option(500, help="Items por tabla del catálogo (0 = ninguno)"),
+    workers: int = typer.Option(multiprocessing.cpu_count(), help="Procesos en paralelo"),
+    chunk_size: int = typer.Option(10_000, help="Usuarios por transacción"),
+    seed: int = typer.Option(0, help="Semilla de la generación"),
+    as_of: Optional[str] = typer.Option(None, help="Fecha de referencia YYYY-MM-DD (hoy por defecto)"),
+):
+    if engine.dialect.name != "postgresql":
+        raise typer.BadParameter("generate needs a PostgreSQL DB_URL (it loads rows with COPY)")
+    reference = date.fromisoformat(as_of) if as_of else date.today()
+
+    if catalog:
+        items = generate_catalog(random.Random(f"{seed}:catalog"), catalog, reference)
+
+        async def insert_catalog():
+            async with connect("bulk") as con:
+                for table, table_items in items.items():
+                    await bulk_insert(con, table, validate_items(table, table_items))
+                await con.commit()
+            await async_engine.dispose()
+
+        asyncio.run(insert_catalog())
+        for table in items:
+            catalog_cache.publish(table, None, "bulk")
+        typer.echo(f"catalog: {catalog} items per table")
+
+    # Un solo hash para todos: bcrypt por usuario haría la carga impracticable
+    password = get_password_hash(f"synthetic-{seed}")
+    jobs = [
+        (seed, chunk, start, min(chunk_size, users - start), password, reference, events_per_user)
+        for chunk, start in enumerate(range(0, users, chunk_size))
+    ]
+    totals = {}
+    # spawn: cada worker abre su propio engine en lugar de heredar el del padre
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for counts in pool.imap_unordered(load_chunk, jobs):
+            for table, count in counts.items():
+                totals[table] = totals.get(table, 0) + count
+            typer.echo(f"{totals['users']}/{users} users")
+
+    typer.echo(json.dumps(totals))
+
+
+# REBUILD ACTIVE USERS
+# Agrega a active_user_sketches los eventos de user_events desde una fecha,
+# para los días anteriores a los sketches o perdidos por un worker caído
+# Ejemplo: python cli.py rebuild-active-users 2024-01-01
+@app.command("rebuild-active-users")
+def rebuild_active_users(
+    since: str,
+    batch_size: int = typer.Option(10_000, help="Eventos por lectura"),
+):
+    try:
+        since_date = date.fromisoformat(since)
+    except ValueError:
+        raise typer.BadParameter("since must be a date YYYY-MM-DD")
+
+    async def rebuild():
+        total = await rebuild_from_events(since_date, batch_size)
+        await async_engine.dispose()
+        return total
+
+    typer.echo(f"{asyncio.run(rebuild())} events")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,120 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+# Tipos que vale la pena comprimir; imágenes y demás ya vienen comprimidos
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def accepted_encodings(value):
+    """Codificaciones de un Accept-Encoding, sin las que traen q=0."""
+    accepted = set()
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, number = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def header(headers, name):
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    """Comprime con brotli o gzip las respuestas JSON y de texto grandes.
+
+    Solo se comprimen las respuestas de un único mensaje (no las streaming),
+    de al menos `minimum_size` bytes y sin Content-Encoding propio. Se prefiere
+    brotli si está instalado y el cliente lo acepta.
+    """
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.minimum_size = settings.minimum_size
+        self.gzip_level = settings.gzip_level
+        self.brotli_quality = settings.brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        # HEAD no lleva cuerpo: su Content-Length tiene que quedar como está
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(header(scope["headers"], b"accept-encoding") or "")
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = header(headers, b"content-type") or ""
+                if header(headers, b"content-encoding") is not None or not content_type.startswith(
+                    COMPRESSIBLE_TYPES
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Se retiene hasta saber el tamaño del cuerpo
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = [
+                (key, value)
+                for key, value in start.get("headers", [])
+                if key.lower() != b"content-length"
+            ]
+            headers.append((b"vary", b"Accept-Encoding"))
+
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streaming o respuesta chica: va tal cual
+                passthrough = True
+                if not message.get("more_body", False):
+                    headers.append((b"content-length", str(len(body)).encode()))
+                await send(dict(start, headers=headers))
+                await send(message)
+                return
+
+            body = self.compress(body, encoding)
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def choose_encoding(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compress(self, body, encoding):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
@@ -0,0 +1,12 @@
+import os
+
+from dynaconf import Dynaconf
+
+# Valores por defecto en settings.toml; se sobrescriben con variables de entorno
+# con prefijo MEDELLIN_, por ejemplo MEDELLIN_DB_POOL_SIZE=20 o
+# MEDELLIN_STATEMENT_TIMEOUTS__READS=1000
+settings = Dynaconf(
+    envvar_prefix="MEDELLIN",
+    root_path=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    settings_files=["settings.toml"],
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Date, String
+from sqlalchemy import Column, Index, Integer, ForeignKey, Date, String
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -12,3 +12,5 @@ class DailyLoginBonus(Base):
     streak = Column(Integer, default=0)
 
     user = relationship("User", back_populates="daily_bonus")
+
+    __table_args__ = (Index("ix_daily_login_bonus_user_id", "user_id"),)
@@ -0,0 +1,107 @@
+import csv
+import io
+
+from pydantic import ValidationError
+
+from cache.catalog_cache import notify_invalidation
+from db.statements import statements
+from schemas.schemas import (
+    BuildRequest,
+    CelebrationRequest,
+    CharacterRequest,
+    MissionRequest,
+)
+
+# Columnas que se cargan por COPY y el esquema con el que se valida cada tabla
+CATALOG_BULK_TABLES = {
+    "buildings": (
+        BuildRequest,
+        ("name", "description", "cost", "preview_build", "experience_require"),
+    ),
+    "characters": (CharacterRequest, ("name", "description")),
+    "missions": (
+        MissionRequest,
+        (
+            "name",
+            "description",
+            "event_name",
+            "target_count",
+            "reward_food",
+            "reward_gold",
+            "reward_wood",
+            "reward_stone",
+            "reward_experience",
+        ),
+    ),
+    "celebrations": (CelebrationRequest, ("name", "description", "date")),
+}
+
+statements.register(
+    "catalog.reserve_ids",
+    "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+    "FROM generate_series(1, :count)",
+)
+
+
+class BulkValidationError(Exception):
+    """El lote tiene items inválidos; no se insertó ninguno."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid items")
+        self.errors = errors
+
+
+def validate_items(table, items):
+    """Valida el lote completo antes de escribir nada."""
+    schema, _ = CATALOG_BULK_TABLES[table]
+    models = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            models.append(schema.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False)})
+    if errors:
+        raise BulkValidationError(errors)
+    return models
+
+
+async def bulk_insert(con, table, models):
+    """Inserta el lote con un solo COPY y devuelve los ids en el orden recibido.
+
+    Los ids se reservan antes de la copia con nextval, así el orden de
+    `models` y el de los ids devueltos coinciden. La invalidación del catálogo
+    se emite una sola vez por lote. El commit queda a cargo de quien llama.
+    """
+    if not models:
+        return []
+
+    _, columns = CATALOG_BULK_TABLES[table]
+    result = await statements.execute(
+        con, "catalog.reserve_ids", {"table": table, "count": len(models)}
+    )
+    ids = sorted(result.scalars())
+
+    rows = []
+    for item_id, model in zip(ids, models):
+        values = model.model_dump(mode="json")
+        rows.append([item_id] + [values[column] for column in columns])
+    await copy_rows(con, table, ["id", *columns], rows)
+
+    await notify_invalidation(con, table, None, "bulk")
+    return ids
+
+
+async def copy_rows(con, table, columns, rows):
+    """COPY de `rows` a `table` por la conexión asyncpg, dentro de la transacción de `con`."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+
+    raw_connection = await con.get_raw_connection()
+    await raw_connection.driver_connection.copy_to_table(
+        table,
+        source=io.BytesIO(buffer.getvalue().encode("utf-8")),
+        columns=list(columns),
+        format="csv",
+    )
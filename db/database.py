@@ -1,13 +1,103 @@
 import os
+import time
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from config.settings import settings
+from db.replicas import REPLICA_LAG_SQL, ReplicaRouter, current_routing
+from db.statements import statements
+from observability.metrics import READ_ROUTING, instrument_engine, observe_pool_wait
+from observability.slow_queries import slow_query_log
+
+# Driver async equivalente a cada driver síncrono
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url):
+    """Convierte DB_URL (libpq/psycopg2) en una URL para el engine async."""
+    async_url = make_url(url)
+    async_url = async_url.set(
+        drivername=ASYNC_DRIVERS.get(async_url.drivername, async_url.drivername)
+    )
+    # asyncpg no entiende sslmode, su equivalente es ssl
+    if async_url.drivername == "postgresql+asyncpg" and "sslmode" in async_url.query:
+        query = dict(async_url.query)
+        query["ssl"] = query.pop("sslmode")
+        async_url = async_url.set(query=query)
+    return async_url
+
+
+def pool_options(url):
+    """Opciones del pool tomadas de settings (sqlite usa su pool por defecto)."""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
+
+def async_connect_args(url):
+    """statement_timeout por defecto y caché de sentencias preparadas de asyncpg."""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    timeout = settings.statement_timeouts.default
+    return {
+        "server_settings": {"statement_timeout": str(int(timeout))},
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+    }
+
 
 url = os.environ['DB_URL']
-engine = create_engine(url)
+engine = create_engine(url, **pool_options(url))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine async usado por todos los routers; el síncrono queda para el CLI
+async_engine = create_async_engine(
+    to_async_url(url), connect_args=async_connect_args(url), **pool_options(url)
+)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+slow_query_log.instrument(engine)
+slow_query_log.instrument(async_engine.sync_engine)
+
+# Réplicas de lectura opcionales: settings.replicas.urls (vacío = solo primario)
+replica_router = ReplicaRouter(
+    [
+        create_async_engine(
+            to_async_url(replica_url),
+            connect_args=async_connect_args(replica_url),
+            **pool_options(replica_url),
+        )
+        for replica_url in settings.replicas.urls
+    ],
+    settings.replicas.max_lag_seconds,
+    settings.replicas.check_interval_seconds,
+)
+for index, replica_engine in enumerate(replica_router.engines):
+    instrument_engine(replica_engine.sync_engine, f"replica{index}")
+    slow_query_log.instrument(replica_engine.sync_engine)
+
+statements.register("replica.lag", REPLICA_LAG_SQL)
+
+# Tipos de ruta que escriben: fijan al cliente al primario por un momento
+WRITE_ROUTE_CLASSES = ("writes", "bulk")
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -15,4 +105,92 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+async def apply_statement_timeout(con, route_class):
+    """Ajusta statement_timeout de la conexión al tipo de ruta (auth, reads, writes).
+
+    El valor se guarda en con.info, que vive con la conexión del pool, así solo
+    se envía el SET cuando la conexión cambia de tipo de ruta. Se ejecuta sobre
+    el driver antes de que SQLAlchemy abra la transacción, para que un rollback
+    posterior no lo deshaga.
+    """
+    if con.dialect.name != "postgresql":
+        return
+    timeout = int(settings.statement_timeouts[route_class])
+    if con.info.get("statement_timeout") == timeout:
+        return
+    raw_connection = await con.get_raw_connection()
+    await raw_connection.driver_connection.execute(f"SET statement_timeout = {timeout}")
+    con.info["statement_timeout"] = timeout
+
+
+async def connect_replica():
+    """Conexión a la siguiente réplica utilizable, o None si no hay ninguna.
+
+    Cuando toca medir el atraso de la réplica se hace sobre esta misma
+    conexión; si está atrasada se cierra y la lectura va al primario.
+    """
+    replica = replica_router.pick()
+    if replica is None:
+        return None
+    try:
+        con = await replica.engine.connect()
+    except Exception:
+        replica_router.mark_down(replica)
+        return None
+
+    if replica_router.needs_check(replica):
+        try:
+            lag = (await statements.execute(con, "replica.lag")).scalar()
+            await con.rollback()
+        except Exception:
+            replica_router.mark_down(replica)
+            await con.close()
+            return None
+        replica_router.record_lag(replica, float(lag or 0))
+        if not replica.available:
+            await con.close()
+            return None
+    return con
+
+
+@asynccontextmanager
+async def connect(route_class="reads", replica=False):
+    """Conexión del pool async con el statement_timeout de `route_class`.
+
+    Con replica=True (solo lecturas que toleran algo de atraso) la conexión
+    sale de una réplica, salvo que no haya réplicas al día o que el cliente
+    haya escrito hace poco (ver ReadYourWritesMiddleware).
+    """
+    routing = current_routing.get()
+    if route_class in WRITE_ROUTE_CLASSES and routing is not None:
+        routing.wrote = True
+
+    start = time.perf_counter()
+    con = None
+    if replica:
+        if routing is None or not routing.read_primary:
+            con = await connect_replica()
+        READ_ROUTING.labels("primary" if con is None else "replica").inc()
+    if con is None:
+        con = await async_engine.connect()
+    # connect() toma la conexión del pool: lo que tarda es la espera por ella
+    observe_pool_wait(route_class, time.perf_counter() - start)
+    try:
+        await apply_statement_timeout(con, route_class)
+        yield con
+    finally:
+        await con.close()
+
+
+async def dispose_async_engines():
+    await async_engine.dispose()
+    for replica_engine in replica_router.engines:
+        await replica_engine.dispose()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
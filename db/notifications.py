@@ -0,0 +1,103 @@
+import logging
+import os
+import select
+import threading
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    """Hilo que escucha canales de Postgres (LISTEN) y reparte los NOTIFY.
+
+    Una sola conexión por worker atiende todos los canales suscriptos. Cada
+    canal tiene un `handle(payload)`, que corre en este hilo, y opcionalmente
+    un `reset()`, que se llama al (re)conectar porque los mensajes enviados
+    mientras no había conexión se perdieron.
+    """
+
+    def __init__(self, dsn=None, poll_timeout=5.0, retry_delay=1.0):
+        self.dsn = dsn
+        self.poll_timeout = poll_timeout
+        self.retry_delay = retry_delay
+        self._channels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, channel, handle, reset=None):
+        """Registra un canal; tiene que hacerse antes de start()."""
+        self._channels[channel] = (handle, reset)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # LISTEN/NOTIFY es de Postgres; con SQLite cada worker solo se avisa a sí mismo
+        if not make_url(self.dsn or os.environ["DB_URL"]).get_backend_name().startswith("postgres"):
+            logger.info("Notification listener disabled: DB_URL is not PostgreSQL")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="notification-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_timeout + 1)
+
+    def _reset(self):
+        for channel, (_, reset) in self._channels.items():
+            if reset is None:
+                continue
+            # El error de un suscriptor no puede matar el hilo ni saltear a los demás
+            try:
+                reset()
+            except Exception:
+                logger.exception("Reset of channel %s failed", channel)
+
+    def _dispatch(self, channel, payload):
+        handle, _ = self._channels.get(channel, (None, None))
+        if handle is None:
+            return
+        try:
+            handle(payload)
+        except Exception:
+            logger.exception("Handler of channel %s failed", channel)
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            listening = False
+            try:
+                conn = psycopg2.connect(self.dsn or os.environ["DB_URL"])
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    for channel in self._channels:
+                        cur.execute(f"LISTEN {channel}")
+
+                # Mientras estuvimos desconectados pudimos perder mensajes
+                listening = True
+                self._reset()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._dispatch(notify.channel, notify.payload)
+            except psycopg2.Error:
+                # Si perdemos la conexión, avisamos (una vez por corte) y reintentamos
+                if listening:
+                    self._reset()
+                self._stop.wait(self.retry_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+notification_listener = NotificationListener()
@@ -0,0 +1,130 @@
+import itertools
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+
+# Cookie con el instante (epoch) hasta el que el cliente lee del primario
+PRIMARY_COOKIE = "read_primary_until"
+
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.available = True
+        self.lag = None
+        self.checked_at = float("-inf")
+
+
+class ReplicaRouter:
+    """Reparte las lecturas entre las réplicas en round-robin.
+
+    El atraso de cada réplica se mide como mucho cada `check_interval`
+    segundos, sobre la misma conexión que va a atender la lectura. Las
+    réplicas atrasadas más de `max_lag` segundos, o que no aceptan
+    conexiones, se saltan hasta la siguiente medición.
+    """
+
+    def __init__(self, engines, max_lag, check_interval):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+
+    def pick(self):
+        """Siguiente réplica utilizable, o None para leer del primario."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._counter) % len(self.replicas)]
+            if replica.available or self.needs_check(replica, now):
+                return replica
+        return None
+
+    def needs_check(self, replica, now=None):
+        now = time.monotonic() if now is None else now
+        return now - replica.checked_at >= self.check_interval
+
+    def record_lag(self, replica, lag):
+        replica.lag = lag
+        replica.available = lag <= self.max_lag
+        replica.checked_at = time.monotonic()
+
+    def mark_down(self, replica):
+        replica.available = False
+        replica.checked_at = time.monotonic()
+
+    @property
+    def engines(self):
+        return [replica.engine for replica in self.replicas]
+
+
+class RoutingState:
+    """Lecturas y escrituras de la petición en curso.
+
+    `read_primary` llega en la cookie de una escritura reciente del mismo
+    cliente; `wrote` se marca cuando la petición usa una conexión de escritura.
+    """
+
+    __slots__ = ("read_primary", "wrote")
+
+    def __init__(self, read_primary):
+        self.read_primary = read_primary
+        self.wrote = False
+
+
+# Fuera de una petición (CLI, listener, cachés) no hay estado de routing
+current_routing = ContextVar("current_routing", default=None)
+
+
+class ReadYourWritesMiddleware:
+    """Tras una escritura, el cliente lee del primario durante `window` segundos.
+
+    Así una lectura justo después de escribir no cae en una réplica que
+    todavía no tiene el cambio, aunque la atienda otro worker.
+    """
+
+    def __init__(self, app, window):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = RoutingState(self._read_primary(scope))
+        token = current_routing.set(state)
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = int(time.time() + self.window)
+                cookie = f"{PRIMARY_COOKIE}={until}; Max-Age={self.window}; Path=/; HttpOnly"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            current_routing.reset(token)
+
+    def _read_primary(self, scope):
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                cookie = SimpleCookie()
+                cookie.load(value.decode("latin-1"))
+                morsel = cookie.get(PRIMARY_COOKIE)
+                if morsel is not None:
+                    try:
+                        return float(morsel.value) > time.time()
+                    except ValueError:
+                        return False
+        return False
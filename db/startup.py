@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from config.settings import settings
+from db.database import Base, async_engine
+from observability.metrics import TIME_TO_READY
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    """Estado del arranque diferido, consultado por /health/ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.last_error = None
+        self.time_to_ready = None
+
+
+async def verify_schema():
+    """Crea las tablas que falten, igual que el create_all que corría al importar main."""
+    async with async_engine.begin() as con:
+        await con.run_sync(Base.metadata.create_all)
+
+
+async def warm_pool(size):
+    """Abre `size` conexiones del pool en paralelo y las devuelve al pool."""
+    results = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(size)),
+        return_exceptions=True,
+    )
+    for result in results:
+        if not isinstance(result, BaseException):
+            await result.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def run_startup(state, started_at):
+    """Verifica el esquema y precalienta el pool, reintentando hasta lograrlo.
+
+    Corre en segundo plano desde el lifespan: la app no se cae si la base no
+    responde al arrancar, solo sigue sin estar lista. `started_at` es el
+    time.perf_counter() del inicio del proceso.
+    """
+    warm_connections = min(settings.startup.warm_connections, settings.db_pool_size)
+    delay = 0.5
+    while True:
+        state.attempts += 1
+        try:
+            if settings.startup.verify_schema:
+                await verify_schema()
+            await warm_pool(warm_connections)
+            break
+        except Exception as e:
+            state.last_error = str(e)
+            logger.warning("Startup attempt %s failed: %s", state.attempts, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.startup.max_retry_seconds)
+
+    state.time_to_ready = time.perf_counter() - started_at
+    state.last_error = None
+    state.ready = True
+    TIME_TO_READY.set(state.time_to_ready)
+    logger.info("Ready in %.3f s (%s connections warmed)", state.time_to_ready, warm_connections)
+
+
+async def ping():
+    """SELECT 1 con una conexión del pool, con límite de settings.startup.ready_timeout."""
+    async def select_one():
+        async with async_engine.connect() as con:
+            await con.execute(text("SELECT 1"))
+
+    await asyncio.wait_for(select_one(), settings.startup.ready_timeout)
+
+
+def pool_status():
+    pool = async_engine.pool
+    # Los pools de SQLite (NullPool, StaticPool) no llevan estas cuentas
+    if not hasattr(pool, "checkedout"):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+startup_state = StartupState()
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+
+class StatementRegistry:
+    """Registro central de las sentencias SQL del servicio.
+
+    Cada sentencia se construye una sola vez al importar el módulo que la
+    registra, con un nombre estable. Todas se ejecutan a través de
+    `execute`, que acumula el número de ejecuciones y el tiempo total por
+    nombre. asyncpg prepara cada sentencia en el servidor la primera vez que
+    una conexión la usa y la reutiliza después (ver
+    db_prepared_statement_cache_size en settings.toml).
+    """
+
+    def __init__(self):
+        self._statements = {}
+        self._calls = {}
+        self._total_time = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, statement):
+        """Registra `statement` (SQL o text()) con `name` y lo devuelve compilado."""
+        if not isinstance(statement, TextClause):
+            statement = text(statement)
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing is not None and str(existing) != str(statement):
+                raise ValueError(f"Statement {name} is already registered")
+            self._statements[name] = statement
+            self._calls.setdefault(name, 0)
+            self._total_time.setdefault(name, 0.0)
+        return statement
+
+    def variant(self, name, key, build):
+        """Sentencias con forma variable (filtros u orden opcionales).
+
+        Cada combinación `key` se construye una sola vez con `build()` y queda
+        registrada como `name[key]`.
+        """
+        variant_name = f"{name}[{key}]"
+        if variant_name not in self._statements:
+            self.register(variant_name, build())
+        return variant_name
+
+    def get(self, name):
+        return self._statements[name]
+
+    async def execute(self, con, name, params=None):
+        statement = self._statements[name]
+        start = time.perf_counter()
+        try:
+            return await con.execute(statement, params or {})
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._calls[name] += 1
+                self._total_time[name] += elapsed
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "sql": " ".join(str(statement).split()),
+                    "calls": self._calls[name],
+                    "total_ms": round(self._total_time[name] * 1000, 3),
+                    "avg_ms": round(
+                        self._total_time[name] * 1000 / self._calls[name], 3
+                    )
+                    if self._calls[name]
+                    else 0.0,
+                }
+                for name, statement in sorted(self._statements.items())
+            ]
+
+
+statements = StatementRegistry()
@@ -0,0 +1,192 @@
+import asyncio
+import random
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from itertools import accumulate
+
+from UserEventEnum.UserEventEnum import UserEventEnum
+from db.bulk import copy_rows
+from db.database import async_engine, connect
+
+# Peso relativo de cada evento: la mayoría del tráfico son clics de mesa y juego
+EVENT_WEIGHTS = {
+    UserEventEnum.CLICK_TABLE: 30,
+    UserEventEnum.CLICK_PLAY_NOW: 20,
+    UserEventEnum.CLICK_JOIN: 15,
+    UserEventEnum.CLICK_LB: 8,
+    UserEventEnum.CLICK_CREATE_TABLE: 6,
+    UserEventEnum.CLICK_WEEKLY_LB: 5,
+    UserEventEnum.CLICK_INVITE_OPEN_SEAT: 4,
+    UserEventEnum.CLICK_JOIN_DISCORD_TABLE: 3,
+    UserEventEnum.CLICK_JOIN_DISCORD_LOBBY: 3,
+    UserEventEnum.CLICK_ADD_TO_SERVER: 2,
+    UserEventEnum.CLICK_INVITE_TOP_LEFT: 2,
+    UserEventEnum.CLICK_INVITE_LOWER_LEFT: 2,
+}
+EVENT_NAMES = [event.value for event in EVENT_WEIGHTS]
+EVENT_CUMULATIVE_WEIGHTS = list(accumulate(EVENT_WEIGHTS.values()))
+
+FIRST_NAMES = ("Ana", "Juan", "Camila", "Andrés", "Valentina", "Mateo", "Sofía", "Santiago", "Isabella", "Samuel")
+LAST_NAMES = ("Gómez", "Restrepo", "Zapata", "Vélez", "Correa", "Mejía", "Ospina", "Arango", "Cardona", "Uribe")
+
+USER_COLUMNS = ("id", "name", "email", "password", "registerdatetime")
+RESOURCE_COLUMNS = ("user_id", "food", "gold", "wood", "stone", "experience")
+EVENT_COLUMNS = ("user_id", "event_name", "timestamp")
+BONUS_COLUMNS = ("user_id", "last_login_date", "streak")
+
+
+def chunk_rng(seed, chunk):
+    """Cada bloque tiene su propio generador: el resultado no depende de los workers."""
+    return random.Random(f"{seed}:{chunk}")
+
+
+def random_instant(rng, start, end):
+    return start + timedelta(seconds=rng.uniform(0, (end - start).total_seconds()))
+
+
+def generate_user(rng, index, password, as_of, events_per_user):
+    """Filas de un usuario: users, user_resources, user_events y daily_login_bonus."""
+    now = datetime.combine(as_of, time(23, 59, 59), tzinfo=timezone.utc)
+    registered = now - timedelta(days=rng.uniform(0, 365))
+    user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    user = (
+        user_id,
+        f"{first} {last}",
+        f"user{index}@example.com",
+        password,
+        registered.isoformat(),
+    )
+
+    # Pocos usuarios generan la mayoría de los eventos (cola larga)
+    event_count = int(rng.expovariate(1 / events_per_user)) if events_per_user else 0
+    events = [
+        (
+            user_id,
+            rng.choices(EVENT_NAMES, cum_weights=EVENT_CUMULATIVE_WEIGHTS)[0],
+            random_instant(rng, registered, now).isoformat(),
+        )
+        for _ in range(event_count)
+    ]
+    events.sort(key=lambda event: event[2])
+
+    experience = min(100, event_count // 5 + rng.randint(0, 10))
+    resources = (
+        user_id,
+        rng.randint(0, 200 + 40 * event_count),
+        rng.randint(0, 100 + 20 * event_count),
+        rng.randint(0, 150 + 30 * event_count),
+        rng.randint(0, 50 + 10 * event_count),
+        experience,
+    )
+
+    # La racha nunca supera los días desde el registro y termina en el último login
+    days_registered = (as_of - registered.date()).days
+    roll = rng.random()
+    if roll < 0.15:
+        bonus = None  # Nunca reclamó el bono
+    else:
+        if roll < 0.45:
+            last_login = as_of - timedelta(days=rng.randint(0, min(1, days_registered)))
+            mean_streak = 7
+        else:
+            last_login = as_of - timedelta(days=rng.randint(0, days_registered))
+            mean_streak = 2
+        max_streak = (last_login - registered.date()).days + 1
+        streak = min(max_streak, 1 + int(rng.expovariate(1 / mean_streak)))
+        bonus = (user_id, last_login.isoformat(), streak)
+
+    return user, resources, events, bonus
+
+
+def generate_chunk(seed, chunk, start, count, password, as_of, events_per_user):
+    """Genera `count` usuarios a partir del índice `start`, agrupados por tabla."""
+    rng = chunk_rng(seed, chunk)
+    users, resources, events, bonuses = [], [], [], []
+    for index in range(start, start + count):
+        user, resource, user_events, bonus = generate_user(rng, index, password, as_of, events_per_user)
+        users.append(user)
+        resources.append(resource)
+        events.extend(user_events)
+        if bonus is not None:
+            bonuses.append(bonus)
+    return users, resources, events, bonuses
+
+
+async def copy_chunk(rows):
+    users, resources, events, bonuses = rows
+    try:
+        async with connect("bulk") as con:
+            await copy_rows(con, "users", USER_COLUMNS, users)
+            await copy_rows(con, "user_resources", RESOURCE_COLUMNS, resources)
+            await copy_rows(con, "user_events", EVENT_COLUMNS, events)
+            await copy_rows(con, "daily_login_bonus", BONUS_COLUMNS, bonuses)
+            await con.commit()
+    finally:
+        await async_engine.dispose()
+
+
+def load_chunk(job):
+    """Punto de entrada de cada worker: genera un bloque y lo carga con COPY.
+
+    Cada bloque va en su propia transacción. Devuelve las filas insertadas
+    por tabla.
+    """
+    rows = generate_chunk(*job)
+    asyncio.run(copy_chunk(rows))
+    users, resources, events, bonuses = rows
+    return {
+        "users": len(users),
+        "user_resources": len(resources),
+        "user_events": len(events),
+        "daily_login_bonus": len(bonuses),
+    }
+
+
+def generate_catalog(rng, size, as_of):
+    """Items de buildings, characters, missions y celebrations listos para validar."""
+    buildings = ("Torre", "Granja", "Castillo", "Mercado", "Muralla", "Templo", "Herrería", "Puerto")
+    adjectives = ("Gran", "Antigua", "Real", "Pequeña", "Dorada", "Oculta")
+    events = [event.value for event in UserEventEnum]
+    return {
+        "buildings": [
+            {
+                "name": f"{rng.choice(buildings)} {rng.choice(adjectives)} {i}",
+                "description": "Edificio de la aldea",
+                "cost": int(rng.lognormvariate(5, 1)),
+                "preview_build": f"buildings/{i}.png",
+                "experience_require": rng.randint(0, 100),
+            }
+            for i in range(size)
+        ],
+        "characters": [
+            {
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(adjectives)} {i}",
+                "description": "Personaje de la aldea",
+            }
+            for i in range(size)
+        ],
+        "missions": [
+            {
+                "name": f"Misión {i}",
+                "description": "Misión diaria",
+                "event_name": rng.choice(events),
+                "target_count": rng.randint(1, 50),
+                "reward_food": rng.randint(0, 100),
+                "reward_gold": rng.randint(0, 100),
+                "reward_wood": rng.randint(0, 100),
+                "reward_stone": rng.randint(0, 50),
+                "reward_experience": rng.randint(1, 20),
+            }
+            for i in range(size)
+        ],
+        "celebrations": [
+            {
+                "name": f"Fiesta {rng.choice(adjectives)} {i}",
+                "description": "Celebración de la aldea",
+                "date": (as_of + timedelta(days=rng.randint(-180, 180))).isoformat(),
+            }
+            for i in range(size)
+        ],
+    }
@@ -0,0 +1,12 @@
+from db.database import Base
+from sqlalchemy import BigInteger, Column, DateTime, String, func
+
+
+class TableVersion(Base):
+    """Versión de cada tabla; la suben los triggers de migrations/004 en cada escritura."""
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
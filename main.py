@@ -1,23 +1,32 @@
-import os
-import jwt
-import psycopg2
+import time
 
+# Inicio del proceso, para medir el tiempo hasta estar listo
+BOOT_TIME = time.perf_counter()
 
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import timedelta
-from typing import List
-from psycopg2.extras import RealDictCursor
 from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
 from authentication.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    ALGORITHM,
-    SECRET_KEY,
     create_access_token,
     verify_password,
 )
-from db import database
-from db.database import engine
+from db.database import dispose_async_engines
+from db.replicas import ReadYourWritesMiddleware
+from config.settings import settings
+from db.startup import run_startup, startup_state
+from db.notifications import notification_listener
+from push.push import push_hub
+from users.deletion import deletion_worker
+from user_events.active_users import active_users
+from scheduler.jobs import register_jobs
+from scheduler.scheduler import scheduler
+from observability.metrics import MetricsMiddleware
+from admission.admission import AdmissionControlMiddleware
+from compression.compression import CompressionMiddleware
 from routes import (
     users,
     buildings,
@@ -27,6 +36,11 @@ from routes import (
     user_events,
     user_resources,
     daily_login_bonus,
+    catalog,
+    admin,
+    metrics,
+    health,
+    realtime,
 )
 
 
@@ -39,9 +53,59 @@ tags_metadata = [
     {"name": "buildings", "description": "Operations for buildings."},
     {"name": "characters", "description": "Operations for characters."},
     {"name": "celebrations", "description": "Operations for celebrations."},
+    {"name": "catalog", "description": "Search across the catalog."},
+    {"name": "admin", "description": "Service diagnostics."},
+    {"name": "health", "description": "Liveness and readiness probes."},
 ]
 
-app = FastAPI()
+
+async def start_when_ready():
+    await run_startup(startup_state, BOOT_TIME)
+    # Los workers en segundo plano usan las tablas que crea el arranque, así
+    # que empiezan recién cuando la app está lista. Los borrados de usuarios
+    # encolados corren fuera de las peticiones
+    deletion_worker.start()
+    # Mantenimiento periódico; los jobs con líder corren en un solo worker
+    if settings.scheduler.enabled:
+        if not scheduler.jobs:
+            register_jobs(scheduler)
+        scheduler.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Escuchamos los NOTIFY de cualquier worker: invalidaciones del catálogo y
+    # cambios de recursos para los clientes conectados por WebSocket
+    push_hub.bind(asyncio.get_running_loop())
+    notification_listener.start()
+    # El esquema y el pool se preparan en segundo plano: la app arranca aunque
+    # la base no responda y /health/ready dice cuándo puede recibir tráfico
+    startup_task = asyncio.create_task(start_when_ready())
+    yield
+    startup_task.cancel()
+    await asyncio.gather(startup_task, return_exceptions=True)
+    await deletion_worker.stop()
+    await scheduler.stop()
+    # Lo que quedó en memoria desde el último flush; un fallo ya queda en el log
+    try:
+        await active_users.flush()
+    except Exception:
+        pass
+    notification_listener.stop()
+    await dispose_async_engines()
+
+
+app = FastAPI(lifespan=lifespan)
+# El último middleware agregado es el más externo: las métricas ven también
+# las peticiones que admission control rechaza, y la compresión, la más
+# interna, entra en la latencia medida
+app.add_middleware(CompressionMiddleware, settings=settings.compression)
+app.add_middleware(
+    ReadYourWritesMiddleware, window=settings.replicas.read_your_writes_seconds
+)
+if settings.admission.enabled:
+    app.add_middleware(AdmissionControlMiddleware, settings=settings.admission)
+app.add_middleware(MetricsMiddleware)
 app.include_router(users.router)
 app.include_router(user_events.router)
 app.include_router(user_resources.router)
@@ -50,59 +114,31 @@ app.include_router(buildings.router)
 app.include_router(celebrations.router)
 app.include_router(characters.router)
 app.include_router(missions.router)
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-database.Base.metadata.create_all(bind=engine)
-
-
-def get_db_connection():
-    conn = psycopg2.connect(os.environ["DB_URL"], cursor_factory=RealDictCursor)
-    return conn
-
-
-# Dependencia para verificar el token
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            try:
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                username: str = payload.get("sub")
-                if username is None:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                    )
-                # Verificar si el usuario existe en la base de datos
-                cur.execute("SELECT * FROM users WHERE email = %s", (username,))
-                user = cur.fetchone()
-                if user is None:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="User not found",
-                    )
-                return user
-            except JWTError:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                )
+app.include_router(catalog.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
+app.include_router(realtime.router)
 
 
 # Endpoint para obtener un token
 @app.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            # Obtener usuario por nombre
-            cur.execute("SELECT * FROM users WHERE email = %s", (form_data.username,))
-            user = cur.fetchone()
-            if not user or not verify_password(form_data.password, user["password"]):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid username or password",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            # Crear un token de acceso
-            access_token = create_access_token(
-                data={"sub": user["email"]},
-                expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
-            )
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    # Obtener usuario por nombre
+    user = await users.find_user_by_email(form_data.username, "auth")
+
+    # bcrypt es costoso: lo verificamos fuera del event loop
+    if not user or not await run_in_threadpool(
+        verify_password, form_data.password, user.password
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Crear un token de acceso
+    access_token = create_access_token(
+        data={"sub": user.email},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
     return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,7 @@
+-- Índices para GET /buildings?max_cost=&min_xp=&max_xp=&sort=&limit=&after=
+-- Cada filtro por rango y cada orden (columna, id) se resuelve con un index range scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_buildings_cost_id
+    ON buildings (cost, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_buildings_experience_require_id
+    ON buildings (experience_require, id);
@@ -0,0 +1,3 @@
+-- Experiencia del jugador, necesaria para saber qué edificios tiene desbloqueados
+ALTER TABLE user_resources
+    ADD COLUMN IF NOT EXISTS experience INTEGER NOT NULL DEFAULT 0;
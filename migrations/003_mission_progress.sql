@@ -0,0 +1,21 @@
+-- Criterio basado en eventos y recompensa de cada misión
+ALTER TABLE missions
+    ADD COLUMN IF NOT EXISTS event_name VARCHAR,
+    ADD COLUMN IF NOT EXISTS target_count INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS reward_food INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reward_gold INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reward_wood INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reward_stone INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS reward_experience INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_missions_event_name ON missions (event_name);
+
+-- Contador incremental de progreso por usuario y misión
+CREATE TABLE IF NOT EXISTS user_mission_progress (
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    mission_id INTEGER NOT NULL REFERENCES missions (id) ON DELETE CASCADE,
+    progress INTEGER NOT NULL DEFAULT 0,
+    completed_at TIMESTAMP,
+    CONSTRAINT uq_user_mission_progress UNIQUE (user_id, mission_id)
+);
@@ -0,0 +1,57 @@
+-- updated_at por fila para ETag/Last-Modified de los recursos individuales
+ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE buildings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE characters ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE missions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE celebrations ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Versión por tabla para ETag/Last-Modified de los listados: una sola
+-- lectura por clave primaria decide el 304 sin ejecutar el listado
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+-- Si create_all creó la tabla antes, puede no tener el DEFAULT
+ALTER TABLE table_versions ALTER COLUMN version SET DEFAULT 0;
+
+-- Un incremento por sentencia (no por fila), así un COPY masivo sube la versión una vez
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, now())
+    ON CONFLICT (table_name) DO UPDATE
+    SET version = table_versions.version + 1,
+        updated_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['users', 'buildings', 'characters', 'missions', 'celebrations'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_set_updated_at ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER %I_set_updated_at BEFORE UPDATE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION set_updated_at()',
+            tbl, tbl
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I_bump_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER %I_bump_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+            tbl, tbl
+        );
+        INSERT INTO table_versions (table_name, version) VALUES (tbl, 0) ON CONFLICT DO NOTHING;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,10 @@
+-- Índices para GET /users/{user_id}/state: los eventos recientes se leen con
+-- un index scan hacia atrás y recursos y bono por user_id, sin recorrer la tabla
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_events_user_id_id
+    ON user_events (user_id, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_resources_user_id
+    ON user_resources (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_daily_login_bonus_user_id
+    ON daily_login_bonus (user_id);
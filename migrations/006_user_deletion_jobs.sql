@@ -0,0 +1,20 @@
+-- Baja de usuarios en dos pasos: DELETE /users/{user_id} solo marca deleted_at
+-- y encola un job que borra sus datos en lotes chicos
+ALTER TABLE users ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS user_deletion_jobs (
+    id SERIAL PRIMARY KEY,
+    user_id VARCHAR NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'pending',
+    current_table VARCHAR,
+    deleted_rows INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error VARCHAR,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_user_deletion_jobs_user_id ON user_deletion_jobs (user_id);
+CREATE INDEX IF NOT EXISTS ix_user_deletion_jobs_status_id ON user_deletion_jobs (status, id);
+
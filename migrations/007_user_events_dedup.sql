@@ -0,0 +1,6 @@
+-- Deduplicación de eventos: hash de (user_id, event_name, timestamp) con
+-- índice único. Las filas anteriores quedan en NULL y no entran en el índice
+ALTER TABLE user_events ADD COLUMN IF NOT EXISTS dedup_hash BYTEA;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_user_events_dedup_hash
+    ON user_events (dedup_hash);
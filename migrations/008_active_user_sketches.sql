@@ -0,0 +1,9 @@
+-- Usuarios activos por día: un HyperLogLog por (día, evento), con "" para
+-- todos los eventos. La clave primaria sirve también para leer un rango de días
+CREATE TABLE IF NOT EXISTS active_user_sketches (
+    day DATE NOT NULL,
+    event_name VARCHAR NOT NULL DEFAULT '',
+    registers BYTEA,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (day, event_name)
+);
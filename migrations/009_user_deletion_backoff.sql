@@ -0,0 +1,3 @@
+-- Backoff de los jobs de borrado: tras un fallo el job espera hasta
+-- next_attempt_at antes de que otro worker lo vuelva a tomar
+ALTER TABLE user_deletion_jobs ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ;
@@ -0,0 +1,4 @@
+-- La purga de eventos viejos busca cada lote por timestamp: sin índice cada
+-- lote recorría la tabla completa
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_events_timestamp
+    ON user_events (timestamp);
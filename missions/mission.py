@@ -1,9 +1,22 @@
 from db.database import Base
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, func
 
 class Mission(Base):
     __tablename__ = "missions"
 
     id = Column(Integer,primary_key=True,nullable=False,autoincrement=True)
     name = Column(String,nullable=False)
-    description = Column(String,nullable=False)
\ No newline at end of file
+    description = Column(String,nullable=False)
+
+    # Criterio: la misión se completa con target_count eventos event_name
+    event_name = Column(String,nullable=True,index=True)
+    target_count = Column(Integer,nullable=False,default=1)
+
+    # Recompensa que se otorga al completar la misión
+    reward_food = Column(Integer,nullable=False,default=0)
+    reward_gold = Column(Integer,nullable=False,default=0)
+    reward_wood = Column(Integer,nullable=False,default=0)
+    reward_stone = Column(Integer,nullable=False,default=0)
+    reward_experience = Column(Integer,nullable=False,default=0)
+    # Lo actualiza un trigger en cada UPDATE; de aquí salen ETag y Last-Modified
+    updated_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
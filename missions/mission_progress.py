@@ -0,0 +1,19 @@
+from db.database import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+
+
+class UserMissionProgress(Base):
+    __tablename__ = "user_mission_progress"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    mission_id = Column(
+        Integer, ForeignKey("missions.id", ondelete="CASCADE"), nullable=False
+    )
+    progress = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Un único contador por usuario y misión
+    __table_args__ = (
+        UniqueConstraint("user_id", "mission_id", name="uq_user_mission_progress"),
+    )
@@ -0,0 +1,151 @@
+import threading
+
+from cache.catalog_cache import catalog_cache
+from db.database import connect
+from db.statements import statements
+from push.push import notify_resource_change
+
+# Avanza el contador del usuario; no toca misiones ya completadas
+statements.register(
+    "missions.advance_progress",
+    """
+    INSERT INTO user_mission_progress (user_id, mission_id, progress)
+    VALUES (:user_id, :mission_id, 1)
+    ON CONFLICT (user_id, mission_id) DO UPDATE
+    SET progress = user_mission_progress.progress + 1
+    WHERE user_mission_progress.completed_at IS NULL
+    RETURNING progress
+    """,
+)
+
+statements.register(
+    "missions.complete",
+    """
+    UPDATE user_mission_progress
+    SET completed_at = CURRENT_TIMESTAMP
+    WHERE user_id = :user_id
+      AND mission_id = :mission_id
+      AND completed_at IS NULL
+    RETURNING id
+    """,
+)
+
+statements.register(
+    "missions.grant_reward",
+    """
+    UPDATE user_resources
+    SET food = food + :food,
+        gold = gold + :gold,
+        wood = wood + :wood,
+        stone = stone + :stone,
+        experience = experience + :experience
+    WHERE user_id = :user_id
+    """,
+)
+# Usuario sin fila de recursos: la recompensa crea la fila en lugar de perderse
+statements.register(
+    "missions.create_resources",
+    """
+    INSERT INTO user_resources (user_id, food, gold, wood, stone, experience)
+    VALUES (:user_id, :food, :gold, :wood, :stone, :experience)
+    """,
+)
+
+
+class MissionEventIndex:
+    """Índice en memoria event_name -> misiones que avanzan con ese evento."""
+
+    def __init__(self):
+        self._index = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    async def get(self):
+        with self._lock:
+            if self._index is not None:
+                return self._index
+            version = self._version
+
+        index = {}
+        for mission in await load_missions_with_criteria():
+            index.setdefault(mission["event_name"], []).append(mission)
+
+        with self._lock:
+            if version == self._version:
+                self._index = index
+        return index
+
+    async def missions_for(self, event_name):
+        return (await self.get()).get(event_name, ())
+
+    def invalidate(self, table, item_id=None, op=None):
+        if table != "missions":
+            return
+        with self._lock:
+            self._version += 1
+            self._index = None
+
+
+statements.register(
+    "missions.with_criteria",
+    """
+    SELECT id, event_name, target_count, reward_food, reward_gold,
+           reward_wood, reward_stone, reward_experience
+    FROM missions
+    WHERE event_name IS NOT NULL
+    """,
+)
+
+
+async def load_missions_with_criteria():
+    async with connect("reads") as con:
+        result = await statements.execute(con, "missions.with_criteria")
+        return [dict(row._mapping) for row in result]
+
+
+mission_index = MissionEventIndex()
+catalog_cache.subscribe(mission_index.invalidate)
+
+
+async def apply_event(con, user_id, event_name):
+    """Avanza las misiones afectadas por el evento dentro de la transacción de `con`.
+
+    Solo se consultan las misiones asociadas a `event_name`; el historial de
+    eventos del usuario nunca se vuelve a leer. Devuelve los ids de las
+    misiones completadas por este evento, cuya recompensa ya quedó otorgada
+    en la misma transacción.
+    """
+    completed = []
+    for mission in await mission_index.missions_for(event_name):
+        params = {"user_id": user_id, "mission_id": mission["id"]}
+        row = (
+            await statements.execute(con, "missions.advance_progress", params)
+        ).fetchone()
+
+        # None: la misión ya estaba completada y el contador no se movió
+        if row is None or row.progress < mission["target_count"]:
+            continue
+
+        completed_row = (
+            await statements.execute(con, "missions.complete", params)
+        ).fetchone()
+        if completed_row is None:
+            continue
+
+        reward = {
+            "food": mission["reward_food"],
+            "gold": mission["reward_gold"],
+            "wood": mission["reward_wood"],
+            "stone": mission["reward_stone"],
+            "experience": mission["reward_experience"],
+        }
+        granted = await statements.execute(
+            con, "missions.grant_reward", {"user_id": user_id, **reward}
+        )
+        if not granted.rowcount:
+            await statements.execute(
+                con, "missions.create_resources", {"user_id": user_id, **reward}
+            )
+        await notify_resource_change(con, user_id, "mission_reward", reward)
+        completed.append(mission["id"])
+    return completed
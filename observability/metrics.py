@@ -0,0 +1,189 @@
+import time
+from contextvars import ContextVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de cada petición por ruta",
+    ["method", "route", "status"],
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Tiempo total en la base de datos por petición",
+    ["method", "route"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Consultas ejecutadas por petición",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 12, 20, 50),
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Latencia de cada consulta por engine",
+    ["engine"],
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Espera por una conexión libre del pool, por tipo de ruta",
+    ["route_class"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5),
+)
+
+READ_ROUTING = Counter(
+    "db_read_routing_total",
+    "Lecturas aptas para réplica según dónde se atendieron",
+    ["target"],
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Peticiones rechazadas por admission control",
+    ["route_class", "reason"],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Espera en la cola de admission control por tipo de ruta",
+    ["route_class"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+SINGLE_FLIGHT = Counter(
+    "single_flight_reads_total",
+    "Lecturas coalescidas: leader consulta, shared espera su resultado, negative_hit es un 404 recordado",
+    ["kind", "outcome"],
+)
+PUSH_CONNECTIONS = Gauge(
+    "push_connections",
+    "Conexiones WebSocket abiertas en este worker",
+)
+PUSH_MESSAGES = Counter(
+    "push_messages_total",
+    "Mensajes para los WebSocket: queued se encoló, dropped se perdió por cola llena",
+    ["outcome"],
+)
+SCHEDULER_JOB_RUNS = Counter(
+    "scheduler_job_runs_total",
+    "Disparos de cada job: success, failure, skipped (máximo de instancias) o not_leader",
+    ["job", "outcome"],
+)
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Duración de cada ejecución de un job programado",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900),
+)
+SCHEDULER_LEADER = Gauge(
+    "scheduler_leader",
+    "1 si este worker es el líder del job",
+    ["job"],
+)
+EVENT_DEDUP = Counter(
+    "user_events_dedup_total",
+    "Eventos recibidos: new, duplicate_filter (filtro + base), duplicate_database (índice único) o false_positive",
+    ["outcome"],
+)
+EVENT_DEDUP_FILTER_BYTES = Gauge(
+    "user_events_dedup_filter_bytes",
+    "Memoria de los Bloom filters de deduplicación de eventos",
+)
+ACTIVE_USERS_FLUSHES = Counter(
+    "active_users_flushes_total",
+    "Sketches de usuarios activos combinados con la base: success o failure",
+    ["outcome"],
+)
+TIME_TO_READY = Gauge(
+    "app_time_to_ready_seconds",
+    "Tiempo desde que arranca el proceso hasta que la app queda lista",
+)
+
+
+class RequestStats:
+    """Acumulado de base de datos de la petición en curso."""
+
+    __slots__ = ("scope", "queries", "db_time")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self):
+        """Plantilla de la ruta, disponible una vez que el router la resolvió."""
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+# Las consultas fuera de una petición (CLI, listener, arranque) no tienen stats
+current_request_stats = ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(engine, name):
+    """Cuenta y mide cada consulta de `engine` (para el async, su sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        QUERY_LATENCY.labels(name).observe(elapsed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # La consulta falló: descartamos su inicio para no desalinear la pila
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def observe_pool_wait(route_class, seconds):
+    POOL_WAIT.labels(route_class).observe(seconds)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide latencia, consultas y tiempo de base por ruta.
+
+    La ruta se etiqueta con su plantilla (/buildings/{build_id}) y no con la
+    URL, así el número de series no crece con los ids.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request_stats.reset(token)
+            path = stats.route
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, path, str(status_code)).observe(elapsed)
+            REQUEST_DB_TIME.labels(method, path).observe(stats.db_time)
+            REQUEST_DB_QUERIES.labels(method, path).observe(stats.queries)
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,128 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from config.settings import settings
+from observability.metrics import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+# Un SELECT con alguno de estos tiene efectos al ejecutarse (NOTIFY, secuencias,
+# advisory locks, locks de fila o escrituras en un CTE): no se le hace ANALYZE
+SIDE_EFFECTS_RE = re.compile(
+    r"\b(insert|update|delete|pg_notify|nextval|setval|pg_\w*advisory\w*|pg_sleep|for\s+(key\s+)?share)\b",
+    re.IGNORECASE,
+)
+
+
+def parameter_shapes(parameters, executemany):
+    """Tipos de los parámetros enlazados, sin sus valores."""
+    if executemany:
+        count = len(parameters)
+        parameters = parameters[0] if count else ()
+        return {"executemany": count, "params": parameter_shapes(parameters, False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class SlowQueryLog:
+    """Registro de las consultas que superan slow_query.threshold_ms.
+
+    Cada consulta lenta se escribe en el log con su SQL, la forma de sus
+    parámetros y la ruta que la ejecutó. Una muestra (slow_query.explain_rate)
+    se guarda además con su plan en un buffer circular de tamaño
+    slow_query.buffer_size, que se consulta desde /admin/slow-queries.
+    """
+
+    def __init__(self, threshold_ms, explain_rate, buffer_size):
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self._entries = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    def instrument(self, engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+            if elapsed >= self.threshold:
+                self.record(conn, statement, parameters, executemany, elapsed)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            conn = exception_context.connection
+            if conn is not None and conn.info.get("slow_query_start"):
+                conn.info["slow_query_start"].pop()
+
+    def record(self, conn, statement, parameters, executemany, elapsed):
+        stats = current_request_stats.get()
+        route = stats.route if stats is not None else None
+        shapes = parameter_shapes(parameters, executemany)
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s params=%s",
+            elapsed * 1000,
+            route or "no route",
+            " ".join(statement.split()),
+            shapes,
+        )
+
+        if random.random() >= self.explain_rate:
+            return
+        entry = {
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "route": route,
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql": statement,
+            "params": shapes,
+            "plan": self.explain(conn, statement, parameters, executemany),
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def explain(self, conn, statement, parameters, executemany):
+        """Plan de la consulta con un cursor aparte, en la misma transacción.
+
+        ANALYZE vuelve a ejecutar la sentencia, así que solo se usa con los
+        SELECT sin efectos (ver SIDE_EFFECTS_RE); para el resto se guarda el
+        plan estimado.
+        """
+        if conn.dialect.name != "postgresql" or executemany:
+            return None
+        if statement.lstrip()[:6].upper() == "SELECT" and not SIDE_EFFECTS_RE.search(statement):
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+        else:
+            prefix = "EXPLAIN "
+        cursor = conn.connection.cursor()
+        # Un EXPLAIN fallido no debe abortar la transacción de la petición
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = [row[0] for row in cursor.fetchall()]
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            cursor.close()
+
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries))
+
+
+slow_query_log = SlowQueryLog(
+    settings.slow_query.threshold_ms,
+    settings.slow_query.explain_rate,
+    settings.slow_query.buffer_size,
+)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+from contextlib import contextmanager
+
+from config.settings import settings
+from db.notifications import notification_listener
+from db.statements import statements
+from observability.metrics import PUSH_CONNECTIONS, PUSH_MESSAGES
+
+# Canal de Postgres por el que se difunden los cambios de recursos
+RESOURCE_CHANNEL = "resource_changes"
+RESOURCE_FIELDS = ("food", "gold", "wood", "stone", "experience")
+
+statements.register("push.notify", "SELECT pg_notify(:channel, :payload)")
+
+
+class Subscription:
+    """Mensajes pendientes de una conexión, con una cola acotada.
+
+    Si el cliente no lee y la cola se llena, se marca `overflowed`: ya perdió
+    mensajes y hay que cerrarle la conexión para que vuelva a sincronizar.
+    """
+
+    def __init__(self, user_id, max_pending):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(max_pending)
+        self.overflowed = False
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+            PUSH_MESSAGES.labels("queued").inc()
+        except asyncio.QueueFull:
+            self.overflowed = True
+            PUSH_MESSAGES.labels("dropped").inc()
+
+
+class PushHub:
+    """Reparte los mensajes de cada usuario entre sus conexiones en este worker.
+
+    Una conexión inactiva solo ocupa su corrutina y su cola: no hay polling
+    ni conexiones a la base por cliente, todo llega por el único LISTEN del
+    worker.
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self._subscriptions = {}
+        self._loop = None
+
+    def bind(self, loop):
+        """Event loop de las conexiones; el listener publica desde otro hilo."""
+        self._loop = loop
+
+    @contextmanager
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_pending)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        PUSH_CONNECTIONS.inc()
+        try:
+            yield subscription
+        finally:
+            PUSH_CONNECTIONS.dec()
+            subscriptions = self._subscriptions.get(user_id)
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[user_id]
+
+    def publish(self, message):
+        for subscription in self._subscriptions.get(message.get("user_id"), ()):
+            subscription.offer(message)
+
+    def broadcast(self, message):
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.offer(message)
+
+    def handle_notification(self, payload):
+        """Llamado desde el hilo del listener: pasa el mensaje al event loop."""
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.publish, message)
+
+    def resync(self):
+        """Tras perder la conexión del LISTEN los clientes tienen que releer su estado."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.broadcast, {"type": "resync"})
+
+
+push_hub = PushHub(settings.push.max_pending_messages)
+
+notification_listener.subscribe(RESOURCE_CHANNEL, push_hub.handle_notification, push_hub.resync)
+
+
+async def notify_resource_change(con, user_id, reason, delta):
+    """Encola el aviso de `delta` en la transacción de `con`.
+
+    Como en notify_invalidation, NOTIFY es transaccional: los clientes solo
+    lo reciben si la transacción hace commit.
+    """
+    delta = {field: delta[field] for field in RESOURCE_FIELDS if delta.get(field)}
+    if not delta:
+        return
+    message = {"type": "resources", "user_id": user_id, "reason": reason, "delta": delta}
+    if con.dialect.name != "postgresql":
+        # Sin LISTEN/NOTIFY (SQLite en desarrollo) solo se avisa a este worker
+        push_hub.publish(message)
+        return
+    await statements.execute(
+        con, "push.notify", {"channel": RESOURCE_CHANNEL, "payload": json.dumps(message)}
+    )
@@ -0,0 +1,44 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from config.settings import settings
+from db.statements import statements
+from observability.slow_queries import slow_query_log
+from routes.users import get_current_user
+from schemas.schemas import SlowQueryEntry, StatementStats
+
+router = APIRouter()
+
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    # Cualquiera puede registrarse y obtener un token: hace falta estar en la lista
+    if current_user["email"] not in settings.admin.emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
+
+
+# GET STATEMENT STATS
+# This method return every registered SQL statement with its number of
+# executions and its total and average time in milliseconds
+@router.get(
+    "/admin/statements",
+    status_code=status.HTTP_200_OK,
+    response_model=List[StatementStats],
+    tags=["admin"],
+)
+async def get_statement_stats(current_user: dict = Depends(get_admin_user)):
+    return statements.stats()
+
+
+# GET SLOW QUERIES
+# This method return the latest sampled slow queries, newest first,
+# with the route that ran them and their EXPLAIN plan
+@router.get(
+    "/admin/slow-queries",
+    status_code=status.HTTP_200_OK,
+    response_model=List[SlowQueryEntry],
+    tags=["admin"],
+)
+async def get_slow_queries(current_user: dict = Depends(get_admin_user)):
+    return slow_query_log.entries()
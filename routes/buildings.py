@@ -1,40 +1,65 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Response, status
-from sqlalchemy import text
-from db.database import engine
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import SQLAlchemyError
+from db.database import connect
+from db.statements import statements
+from cache.catalog_cache import catalog_cache, notify_invalidation
+from db.bulk import bulk_insert
+from cache.building_index import building_index
+from cache.single_flight import single_flight
 from schemas.schemas import (
+    BulkCreateResponse,
     BuildRequest,
     BuildResponse,
 )
+from schemas.serializers import rows_response
+from cache.http_cache import cache_headers, table_validators
 
 router = APIRouter()
 
+statements.register(
+    "buildings.create",
+    "INSERT INTO buildings (name, description, cost, preview_build, experience_require) "
+    "VALUES (:name, :description, :cost, :preview_build, :experience_require) RETURNING id",
+)
+statements.register(
+    "buildings.get",
+    "SELECT * from buildings WHERE id=:id",
+)
+statements.register(
+    "buildings.available_resources",
+    "SELECT gold, experience FROM user_resources WHERE user_id = :user_id",
+)
+statements.register(
+    "buildings.delete",
+    "DELETE FROM buildings WHERE id = :id",
+)
+
+# Columnas por las que se puede ordenar el listado (prefijo "-" para descendente)
+BUILDING_SORT_COLUMNS = {
+    "id": "id",
+    "cost": "cost",
+    "experience_require": "experience_require",
+}
+MAX_BUILDINGS_PAGE_SIZE = 100
+
 # BUILDINGS start endpoint
 # POST buildings
 # This method create a new BUILD
 # The parameter is post_build: BuildRequest
-from fastapi import HTTPException, status
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
-
-
 @router.post(
     "/buildings",
     status_code=status.HTTP_201_CREATED,
     response_model=BuildResponse,
     tags=["Buildings"],
 )
-def create_build(post_build: BuildRequest):
-    # Consulta SQL segura con parámetros
-    query = text(
-        "INSERT INTO buildings (name, description, cost, preview_build, experience_require) "
-        "VALUES (:name, :description, :cost, :preview_build, :experience_require) RETURNING id"
-    )
-    with engine.connect() as con:
+async def create_build(post_build: BuildRequest):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(
-                query,
+            result = await statements.execute(
+                con,
+                "buildings.create",
                 {
                     "name": post_build.name,
                     "description": post_build.description,
@@ -54,7 +79,9 @@ def create_build(post_build: BuildRequest):
                     detail="Failed to retrieve the generated ID for the new build.",
                 )
 
-            con.commit()
+            await notify_invalidation(con, "buildings", build_id, "create")
+            await con.commit()
+            catalog_cache.publish("buildings", build_id, "create")
 
             # Devolvemos el nuevo objeto de edificio con el ID asignado
             new_build = BuildResponse(
@@ -68,19 +95,47 @@ def create_build(post_build: BuildRequest):
             return new_build
 
         except SQLAlchemyError as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Database error: {str(e)}",
             )
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An unexpected error occurred: {str(e)}",
             )
 
 
+# POST buildings bulk
+# This method create many buildings in a single transaction using COPY
+# The ids are returned in the same order as the items
+# The parameter is post_builds: List[BuildRequest]
+@router.post(
+    "/buildings/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkCreateResponse,
+    tags=["Buildings"],
+)
+async def create_builds_bulk(post_builds: List[BuildRequest]):
+    async with connect("writes") as con:
+        try:
+            # Todo el lote ya fue validado por FastAPI antes de llegar aquí
+            ids = await bulk_insert(con, "buildings", post_builds)
+            await con.commit()
+        except Exception as e:
+            await con.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred while creating the buildings: {str(e)}",
+            )
+
+    # Una sola invalidación por lote, no una por item
+    catalog_cache.publish("buildings", None, "bulk")
+    return BulkCreateResponse(ids=ids)
+
+
 # GET BUILD
 # This method in the users route searchs build's id
 # The param is build id
@@ -90,42 +145,159 @@ def create_build(post_build: BuildRequest):
     response_model=BuildResponse,
     tags=["Buildings"],
 )
-def get_build(build_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("SELECT * from buildings WHERE id=:id")
-    with engine.connect() as con:
-        # Ejecutamos la consulta con parámetros para evitar inyección SQL
-        result = con.execute(query, {"id": build_id}).fetchone()
-
-        if result is None:  # Si no se encuentra el edificio
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Build with id {build_id} not found",
-            )
+async def get_build(build_id: int):
+    async def load_build():
+        async with connect("reads") as con:
+            # Ejecutamos la consulta con parámetros para evitar inyección SQL
+            row = (
+                await statements.execute(con, "buildings.get", {"id": build_id})
+            ).fetchone()
+            return dict(row._mapping) if row is not None else None
+
+    # Solo vamos a la base de datos si el edificio no está en la cache, y las
+    # peticiones simultáneas por el mismo id comparten una sola consulta
+    result = await catalog_cache.get(
+        "buildings",
+        build_id,
+        lambda: single_flight.do(("buildings", build_id), load_build),
+    )
 
-        return result
+    if result is None:  # Si no se encuentra el edificio
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Build with id {build_id} not found",
+        )
+
+    return result
 
 
 # GET ALL BUILDING
-# This method get all buildings
+# This method get the buildings filtered, sorted and paginated by cursor
+# The params are max_cost, min_xp, max_xp, sort, limit and after
+# The cursor of the next page is returned in the X-Next-Cursor header
 @router.get(
     "/buildings",
     status_code=status.HTTP_200_OK,
     response_model=List[BuildResponse],
     tags=["Buildings"],
 )
-def get_all_buildings():
-    query = text("SELECT * FROM buildings")
-    with engine.connect() as con:
+async def get_all_buildings(
+    request: Request,
+    max_cost: Optional[int] = None,
+    min_xp: Optional[int] = None,
+    max_xp: Optional[int] = None,
+    sort: str = "id",
+    limit: int = Query(20, ge=1, le=MAX_BUILDINGS_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    descending = sort.startswith("-")
+    column = BUILDING_SORT_COLUMNS.get(sort.lstrip("-"))
+    if column is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort, use one of: {', '.join(BUILDING_SORT_COLUMNS)}",
+        )
+
+    # Solo se filtra por columnas indexadas: cada filtro es un index range scan
+    conditions = []
+    params = {"limit": limit + 1}
+    if max_cost is not None:
+        conditions.append("cost <= :max_cost")
+        params["max_cost"] = max_cost
+    if min_xp is not None:
+        conditions.append("experience_require >= :min_xp")
+        params["min_xp"] = min_xp
+    if max_xp is not None:
+        conditions.append("experience_require <= :max_xp")
+        params["max_xp"] = max_xp
+
+    # Paginación por cursor (keyset): seguimos después de la última fila vista
+    if after is not None:
+        after_value, after_id = parse_building_cursor(after)
+        operator = "<" if descending else ">"
+        if column == "id":
+            conditions.append(f"id {operator} :after_id")
+        else:
+            conditions.append(f"({column}, id) {operator} (:after_value, :after_id)")
+            params["after_value"] = after_value
+        params["after_id"] = after_id
+
+    direction = "DESC" if descending else "ASC"
+    order_by = f"id {direction}" if column == "id" else f"{column} {direction}, id {direction}"
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    # Cada combinación de filtros y orden se construye y registra una sola vez
+    statement_name = statements.variant(
+        "buildings.list",
+        f"{where}ORDER BY {order_by}",
+        lambda: f"SELECT * FROM buildings {where}ORDER BY {order_by} LIMIT :limit",
+    )
+
+    async with connect("reads", replica=True) as con:
+        # La versión de la tabla se lee antes que el listado: si el cliente ya la
+        # tiene, respondemos 304 sin ejecutar la consulta
+        validators = await table_validators(con, "buildings")
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
         # Ejecutamos la consulta
-        results = con.execute(query).fetchall()
+        results = (await statements.execute(con, statement_name, params)).fetchall()
 
         if not results:  # Si no hay edificios
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No buildings found"
             )
 
-        return results
+        # Pedimos una fila de más para saber si hay otra página
+        headers = {}
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            headers["X-Next-Cursor"] = f"{getattr(last, column)}:{last.id}"
+
+        return rows_response(BuildResponse, results, cache_headers(validators, headers))
+
+
+def parse_building_cursor(cursor: str):
+    """Convierte el cursor `valor:id` en una tupla de enteros."""
+    try:
+        value, build_id = cursor.split(":")
+        return int(value), int(build_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+# GET AVAILABLE BUILDINGS
+# This method get the buildings that the user has unlocked and can afford
+# The building cost is paid in gold and unlocked with the user's experience
+# The param is user_id
+@router.get(
+    "/users/{user_id}/buildings/available",
+    status_code=status.HTTP_200_OK,
+    response_model=List[BuildResponse],
+    tags=["Buildings"],
+)
+async def get_available_buildings(user_id: str):
+    async with connect("reads", replica=True) as con:
+        resources = (
+            await statements.execute(
+                con,
+                "buildings.available_resources",
+                {"user_id": user_id},
+            )
+        ).fetchone()
+
+    if resources is None:  # Si el usuario no tiene recursos inicializados
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No resources found for user ID {user_id}",
+        )
+
+    # El filtro se resuelve con bisección sobre el índice en memoria
+    buildings = (await building_index.get()).available(resources.experience, resources.gold)
+    return rows_response(BuildResponse, buildings)
 
 
 # DELETE
@@ -137,13 +309,11 @@ def get_all_buildings():
     response_model=BuildResponse,
     tags=["Buildings"],
 )
-def delete_build(build_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("DELETE FROM buildings WHERE id = :id")
-    with engine.connect() as con:
+async def delete_build(build_id: int):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(query, {"id": build_id})
+            result = await statements.execute(con, "buildings.delete", {"id": build_id})
 
             # Confirmamos que se eliminó al menos una fila
             if result.rowcount == 0:
@@ -152,11 +322,13 @@ def delete_build(build_id: int):
                     detail=f"Build with id {build_id} not found",
                 )
 
-            con.commit()
+            await notify_invalidation(con, "buildings", build_id, "delete")
+            await con.commit()
+            catalog_cache.publish("buildings", build_id, "delete")
             return Response(status_code=status.HTTP_204_NO_CONTENT)
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while deleting the build: {str(e)}",
@@ -0,0 +1,22 @@
+from typing import List
+from fastapi import APIRouter, Query, status
+from cache.search_index import search_index
+from schemas.schemas import CatalogSearchResult
+
+router = APIRouter()
+
+
+# SEARCH CATALOG
+# This method search buildings, characters, missions and celebrations
+# by name and description, matching every word of q as a prefix
+# The params are q and limit
+@router.get(
+    "/catalog/search",
+    status_code=status.HTTP_200_OK,
+    response_model=List[CatalogSearchResult],
+    tags=["Catalog"],
+)
+async def search_catalog(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100)):
+    # La búsqueda se resuelve en memoria; solo va a la base para cargar el
+    # índice o aplicar las invalidaciones pendientes
+    return await search_index.search(q, limit)
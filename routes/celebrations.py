@@ -1,14 +1,37 @@
 from typing import List
-from fastapi import APIRouter, FastAPI, HTTPException, Response, status
-from sqlalchemy import text
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from schemas.schemas import (
+    BulkCreateResponse,
     CelebrationRequest,
     CelebrationResponse,
 )
-from db.database import engine
+from schemas.serializers import rows_response
+from cache.http_cache import cache_headers, table_validators
+from db.database import connect
+from db.statements import statements
+from cache.catalog_cache import catalog_cache, notify_invalidation
+from db.bulk import bulk_insert
 
 router = APIRouter()
 
+statements.register(
+    "celebrations.create",
+    "INSERT INTO celebrations (name, description, date) VALUES (:name, :description, :date) RETURNING id"
+,
+)
+statements.register(
+    "celebrations.get",
+    "SELECT * from celebrations WHERE id=:id",
+)
+statements.register(
+    "celebrations.list",
+    "SELECT * from celebrations",
+)
+statements.register(
+    "celebrations.delete",
+    "DELETE FROM celebrations WHERE id = :id",
+)
+
 # Celebration start endpoints Characters
 # POST celebration
 # This method create a new celebration
@@ -19,16 +42,13 @@ router = APIRouter()
     response_model=CelebrationResponse,
     tags=["Celebrations"],
 )
-def create_celebration(post_celebration: CelebrationRequest):
-    # Consulta SQL segura con parámetros
-    query = text(
-        "INSERT INTO celebrations (name, description, date) VALUES (:name, :description, :date) RETURNING id"
-    )
-    with engine.connect() as con:
+async def create_celebration(post_celebration: CelebrationRequest):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(
-                query,
+            result = await statements.execute(
+                con,
+                "celebrations.create",
                 {
                     "name": post_celebration.name,
                     "description": post_celebration.description,
@@ -38,7 +58,9 @@ def create_celebration(post_celebration: CelebrationRequest):
 
             # Obtenemos el ID generado por la base de datos
             build_id = result.scalar()
-            con.commit()
+            await notify_invalidation(con, "celebrations", build_id, "create")
+            await con.commit()
+            catalog_cache.publish("celebrations", build_id, "create")
 
             # Devolvemos el nuevo objeto de celebracion con el ID asignado
             new_celebration = CelebrationResponse(
@@ -50,13 +72,41 @@ def create_celebration(post_celebration: CelebrationRequest):
             return new_celebration
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating the celebration: {str(e)}",
             )
 
 
+# POST celebrations bulk
+# This method create many celebrations in a single transaction using COPY
+# The ids are returned in the same order as the items
+# The parameter is post_celebrations: List[CelebrationRequest]
+@router.post(
+    "/celebrations/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkCreateResponse,
+    tags=["Celebrations"],
+)
+async def create_celebrations_bulk(post_celebrations: List[CelebrationRequest]):
+    async with connect("writes") as con:
+        try:
+            # Todo el lote ya fue validado por FastAPI antes de llegar aquí
+            ids = await bulk_insert(con, "celebrations", post_celebrations)
+            await con.commit()
+        except Exception as e:
+            await con.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred while creating the celebrations: {str(e)}",
+            )
+
+    # Una sola invalidación por lote, no una por item
+    catalog_cache.publish("celebrations", None, "bulk")
+    return BulkCreateResponse(ids=ids)
+
+
 # GET Celebration
 # This method in the Celebration route searchs celebration's id
 # The param is celebration id
@@ -66,21 +116,30 @@ def create_celebration(post_celebration: CelebrationRequest):
     response_model=CelebrationResponse,
     tags=["Celebrations"],
 )
-def get_celebration(celebration_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("SELECT * from celebrations WHERE id=:id")
-    with engine.connect() as con:
-        # Ejecutamos la consulta con parámetros para evitar inyección SQL
-        result = con.execute(query, {"id": celebration_id}).fetchone()
-
-        if result is None:  # Si no se encuentra el celebracion
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Celebration with id {celebration_id} not found",
-            )
+async def get_celebration(celebration_id: int):
+    async def load_celebration():
+        async with connect("reads") as con:
+            # Ejecutamos la consulta con parámetros para evitar inyección SQL
+            row = (
+                await statements.execute(
+                    con,
+                    "celebrations.get",
+                    {"id": celebration_id},
+                )
+            ).fetchone()
+            return dict(row._mapping) if row is not None else None
+
+    # Solo vamos a la base de datos si el item no está en la cache
+    result = await catalog_cache.get("celebrations", celebration_id, load_celebration)
 
-        # JSON
-        return result
+    if result is None:  # Si no se encuentra el celebracion
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Celebration with id {celebration_id} not found",
+        )
+
+    # JSON
+    return result
 
 
 # GET ALL celebrationS
@@ -91,18 +150,23 @@ def get_celebration(celebration_id: int):
     response_model=List[CelebrationResponse],
     tags=["Celebrations"],
 )
-def get_all_celebrations():
-    query = text("SELECT * from celebrations")
-    with engine.connect() as con:
+async def get_all_celebrations(request: Request):
+    async with connect("reads", replica=True) as con:
+        # La versión de la tabla se lee antes que el listado: si el cliente ya la
+        # tiene, respondemos 304 sin ejecutar la consulta
+        validators = await table_validators(con, "celebrations")
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
         # Ejecutamos la consulta
-        results = con.execute(query).fetchall()
+        results = (await statements.execute(con, "celebrations.list")).fetchall()
 
         if not results:  # Si no hay edificios
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No celebrations found"
             )
 
-        return results
+        return rows_response(CelebrationResponse, results, cache_headers(validators))
 
 
 # DELETE
@@ -114,13 +178,15 @@ def get_all_celebrations():
     response_model=CelebrationResponse,
     tags=["Celebrations"],
 )
-def delete_build(celebration_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("DELETE FROM celebrations WHERE id = :id")
-    with engine.connect() as con:
+async def delete_build(celebration_id: int):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(query, {"id": celebration_id})
+            result = await statements.execute(
+                con,
+                "celebrations.delete",
+                {"id": celebration_id},
+            )
 
             # Confirmamos que se eliminó al menos una fila
             if result.rowcount == 0:
@@ -129,11 +195,13 @@ def delete_build(celebration_id: int):
                     detail=f"Celebration with id {celebration_id} not found",
                 )
 
-            con.commit()
+            await notify_invalidation(con, "celebrations", celebration_id, "delete")
+            await con.commit()
+            catalog_cache.publish("celebrations", celebration_id, "delete")
             return Response(status_code=status.HTTP_204_NO_CONTENT)
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while deleting the celebration: {str(e)}",
@@ -1,14 +1,37 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Response, status
-from sqlalchemy import text
-from db.database import engine
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from db.database import connect
+from db.statements import statements
+from cache.catalog_cache import catalog_cache, notify_invalidation
+from db.bulk import bulk_insert
 from schemas.schemas import (
+    BulkCreateResponse,
     CharacterRequest,
     CharacterResponse,
 )
+from schemas.serializers import rows_response
+from cache.http_cache import cache_headers, table_validators
 
 router = APIRouter()
 
+statements.register(
+    "characters.create",
+    "INSERT INTO characters (name, description) VALUES (:name, :description) RETURNING id"
+,
+)
+statements.register(
+    "characters.get",
+    "SELECT * from characters WHERE id=:id",
+)
+statements.register(
+    "characters.list",
+    "SELECT * from characters",
+)
+statements.register(
+    "characters.delete",
+    "DELETE FROM characters WHERE id = :id",
+)
+
 
 # CHARACTERS start endpoints Characters
 # POST Characters
@@ -20,16 +43,13 @@ router = APIRouter()
     response_model=CharacterResponse,
     tags=["Characters"],
 )
-def create_character(post_character: CharacterRequest):
-    # Consulta SQL segura con parámetros
-    query = text(
-        "INSERT INTO characters (name, description) VALUES (:name, :description) RETURNING id"
-    )
-    with engine.connect() as con:
+async def create_character(post_character: CharacterRequest):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(
-                query,
+            result = await statements.execute(
+                con,
+                "characters.create",
                 {
                     "name": post_character.name,
                     "description": post_character.description,
@@ -38,7 +58,9 @@ def create_character(post_character: CharacterRequest):
 
             # Obtenemos el ID generado por la base de datos
             character_id = result.scalar()
-            con.commit()
+            await notify_invalidation(con, "characters", character_id, "create")
+            await con.commit()
+            catalog_cache.publish("characters", character_id, "create")
 
             # Devolvemos el nuevo objeto de misión con el ID asignado
             new_character = CharacterResponse(
@@ -49,13 +71,41 @@ def create_character(post_character: CharacterRequest):
             return new_character
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating the character: {str(e)}",
             )
 
 
+# POST characters bulk
+# This method create many characters in a single transaction using COPY
+# The ids are returned in the same order as the items
+# The parameter is post_characters: List[CharacterRequest]
+@router.post(
+    "/characters/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkCreateResponse,
+    tags=["Characters"],
+)
+async def create_characters_bulk(post_characters: List[CharacterRequest]):
+    async with connect("writes") as con:
+        try:
+            # Todo el lote ya fue validado por FastAPI antes de llegar aquí
+            ids = await bulk_insert(con, "characters", post_characters)
+            await con.commit()
+        except Exception as e:
+            await con.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred while creating the characters: {str(e)}",
+            )
+
+    # Una sola invalidación por lote, no una por item
+    catalog_cache.publish("characters", None, "bulk")
+    return BulkCreateResponse(ids=ids)
+
+
 # GET character
 # This method in the characters route searchs character's id
 # The param is Character id
@@ -65,21 +115,26 @@ def create_character(post_character: CharacterRequest):
     response_model=CharacterResponse,
     tags=["Characters"],
 )
-def get_character(character_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("SELECT * from characters WHERE id=:id")
-    with engine.connect() as con:
-        # Ejecutamos la consulta con parámetros para evitar inyección SQL
-        result = con.execute(query, {"id": character_id}).fetchone()
-
-        if result is None:  # Si no se encuentra el personaje
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Character with id {character_id} not found",
-            )
+async def get_character(character_id: int):
+    async def load_character():
+        async with connect("reads") as con:
+            # Ejecutamos la consulta con parámetros para evitar inyección SQL
+            row = (
+                await statements.execute(con, "characters.get", {"id": character_id})
+            ).fetchone()
+            return dict(row._mapping) if row is not None else None
+
+    # Solo vamos a la base de datos si el item no está en la cache
+    result = await catalog_cache.get("characters", character_id, load_character)
+
+    if result is None:  # Si no se encuentra el personaje
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Character with id {character_id} not found",
+        )
 
-        # El resultado como JSON
-        return result
+    # El resultado como JSON
+    return result
 
 
 # GET All character
@@ -90,17 +145,22 @@ def get_character(character_id: int):
     response_model=List[CharacterResponse],
     tags=["Characters"],
 )
-def get_all_characters():
-    query = text("SELECT * from characters")
-    with engine.connect() as con:
+async def get_all_characters(request: Request):
+    async with connect("reads", replica=True) as con:
+        # La versión de la tabla se lee antes que el listado: si el cliente ya la
+        # tiene, respondemos 304 sin ejecutar la consulta
+        validators = await table_validators(con, "characters")
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
         # Ejecutamos la consulta
-        results = con.execute(query).fetchall()
+        results = (await statements.execute(con, "characters.list")).fetchall()
 
         if not results:  # Si no hay personajes
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No characters found"
             )
-        return results
+        return rows_response(CharacterResponse, results, cache_headers(validators))
 
 
 # DELETE
@@ -112,13 +172,15 @@ def get_all_characters():
     response_model=CharacterResponse,
     tags=["Characters"],
 )
-def delete_build(character_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("DELETE FROM characters WHERE id = :id")
-    with engine.connect() as con:
+async def delete_build(character_id: int):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(query, {"id": character_id})
+            result = await statements.execute(
+                con,
+                "characters.delete",
+                {"id": character_id},
+            )
 
             # Confirmamos que se eliminó al menos una fila
             if result.rowcount == 0:
@@ -127,11 +189,13 @@ def delete_build(character_id: int):
                     detail=f"Character with id {character_id} not found",
                 )
 
-            con.commit()
+            await notify_invalidation(con, "characters", character_id, "delete")
+            await con.commit()
+            catalog_cache.publish("characters", character_id, "delete")
             return Response(status_code=status.HTTP_204_NO_CONTENT)
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while deleting the character: {str(e)}",
@@ -1,88 +1,99 @@
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import text
-from db.database import engine
+from db.database import connect
+from db.statements import statements
 from schemas.schemas import DailyBonusResponse
+from push.push import notify_resource_change
+from users.state import to_date
 from datetime import date, timedelta
 
 router = APIRouter()
 
+statements.register(
+    "daily_login_bonus.get",
+    """
+    SELECT id, user_id, last_login_date, streak
+    FROM daily_login_bonus
+    WHERE user_id = :user_id
+    """,
+)
+statements.register(
+    "daily_login_bonus.create",
+    """
+    INSERT INTO daily_login_bonus (user_id, last_login_date, streak)
+    VALUES (:user_id, :last_login_date, :streak)
+    RETURNING id, user_id, last_login_date, streak
+    """,
+)
+statements.register(
+    "daily_login_bonus.update",
+    """
+    UPDATE daily_login_bonus
+    SET last_login_date = :last_login_date,
+        streak = :streak
+    WHERE user_id = :user_id
+    RETURNING id, user_id, last_login_date, streak
+    """,
+)
+statements.register(
+    "daily_login_bonus.grant_resources",
+    """
+    UPDATE user_resources
+    SET food = food + :food,
+        gold = gold + :gold,
+        wood = wood + :wood,
+        stone = stone + :stone
+    WHERE user_id = :user_id
+    """,
+)
+
 @router.post(
     "/daily-login-bonus/",
     status_code=status.HTTP_200_OK,
     response_model=DailyBonusResponse,
     tags=["Daily Login Bonus"],
 )
-def daily_login_bonus(user_id: int):
+async def daily_login_bonus(user_id: str):
     today = date.today()
 
-    # Query para verificar si el usuario tiene un registro de daily_login_bonus
-    select_query = text(
-        """
-        SELECT id, user_id, last_login_date, streak
-        FROM daily_login_bonus
-        WHERE user_id = :user_id
-        """
-    )
-
-    # Query para insertar un nuevo registro
-    insert_query = text(
-        """
-        INSERT INTO daily_login_bonus (user_id, last_login_date, streak)
-        VALUES (:user_id, :last_login_date, :streak)
-        RETURNING id, user_id, last_login_date, streak
-        """
-    )
-
-    # Query para actualizar el registro existente
-    update_query = text(
-        """
-        UPDATE daily_login_bonus
-        SET last_login_date = :last_login_date,
-            streak = :streak
-        WHERE user_id = :user_id
-        RETURNING id, user_id, last_login_date, streak
-        """
-    )
-
-    # Query para actualizar los recursos del usuario
-    update_resources_query = text(
-        """
-        UPDATE user_resources
-        SET food = food + :food,
-            gold = gold + :gold,
-            wood = wood + :wood,
-            stone = stone + :stone
-        WHERE user_id = :user_id
-        """
-    )
-
-    with engine.connect() as con:
+    async with connect("writes") as con:
         try:
             # Verificar si el usuario tiene un registro en daily_login_bonus
-            result = con.execute(select_query, {"user_id": user_id}).fetchone()
+            result = (
+                await statements.execute(
+                    con,
+                    "daily_login_bonus.get",
+                    {"user_id": user_id},
+                )
+            ).fetchone()
 
             if not result:
                 # Crear un nuevo registro si no existe
-                new_bonus = con.execute(
-                    insert_query,
-                    {
-                        "user_id": user_id,
-                        "last_login_date": today,
-                        "streak": 1,
-                    },
+                new_bonus = (
+                    await statements.execute(
+                        con,
+                        "daily_login_bonus.create",
+                        {
+                            "user_id": user_id,
+                            "last_login_date": today,
+                            "streak": 1,
+                        },
+                    )
                 ).fetchone()
-                con.commit()
+                await con.commit()
 
                 # Aplicar el bono inicial
                 bonus = {"food": 50, "gold": 20, "wood": 30, "stone": 10}
-                con.execute(
-                    update_resources_query,
+                granted = await statements.execute(
+                    con,
+                    "daily_login_bonus.grant_resources",
                     {
                         "user_id": user_id,
                         **bonus,
                     },
                 )
-                con.commit()
+                if granted.rowcount:
+                    await notify_resource_change(con, user_id, "daily_bonus", bonus)
+                await con.commit()
 
                 return DailyBonusResponse(
                     message="Welcome! Here is your first daily bonus.",
@@ -91,7 +102,7 @@ def daily_login_bonus(user_id: int):
                 )
 
             # Si ya reclamó el bono hoy, devolver un error
-            last_login_date = result.last_login_date
+            last_login_date = to_date(result.last_login_date)
             if last_login_date == today:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -106,28 +117,34 @@ def daily_login_bonus(user_id: int):
                 streak = 1
 
             # Actualizar el registro
-            updated_bonus = con.execute(
-                update_query,
-                {
-                    "user_id": user_id,
-                    "last_login_date": today,
-                    "streak": streak,
-                },
+            updated_bonus = (
+                await statements.execute(
+                    con,
+                    "daily_login_bonus.update",
+                    {
+                        "user_id": user_id,
+                        "last_login_date": today,
+                        "streak": streak,
+                    },
+                )
             ).fetchone()
-            con.commit()
+            await con.commit()
 
             # Calcular el bono basado en la racha
             bonus = calculate_bonus(streak)
 
             # Aplicar el bono
-            con.execute(
-                update_resources_query,
+            granted = await statements.execute(
+                con,
+                "daily_login_bonus.grant_resources",
                 {
                     "user_id": user_id,
                     **bonus,
                 },
             )
-            con.commit()
+            if granted.rowcount:
+                await notify_resource_change(con, user_id, "daily_bonus", bonus)
+            await con.commit()
 
             return DailyBonusResponse(
                 message="Daily bonus claimed!",
@@ -135,7 +152,7 @@ def daily_login_bonus(user_id: int):
                 streak=updated_bonus.streak,
             )
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while processing the daily login bonus: {str(e)}",
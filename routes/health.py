@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Response, status
+from db.startup import ping, pool_status, startup_state
+
+router = APIRouter()
+
+
+# LIVENESS
+# This method answer while the process can serve requests, even if the
+# database is down, so the orchestrator does not restart it for that
+@router.get("/health/live", status_code=status.HTTP_200_OK, tags=["health"])
+async def liveness():
+    return {"status": "alive", **pool_status()}
+
+
+# READINESS
+# This method answer 503 until the schema is verified and the pool is
+# warmed up, and later whenever the database does not answer a ping
+@router.get("/health/ready", status_code=status.HTTP_200_OK, tags=["health"])
+async def readiness(response: Response):
+    if not startup_state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {
+            "status": "starting",
+            "attempts": startup_state.attempts,
+            "last_error": startup_state.last_error,
+        }
+
+    try:
+        await ping()
+    except Exception as e:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable", "error": str(e) or type(e).__name__, **pool_status()}
+
+    return {
+        "status": "ready",
+        "time_to_ready_ms": round(startup_state.time_to_ready * 1000, 3),
+        **pool_status(),
+    }
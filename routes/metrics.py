@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from observability.metrics import render_metrics
+
+router = APIRouter()
+
+
+# GET METRICS
+# This method return the request, query and pool metrics in the
+# Prometheus text format, to be scraped by Prometheus
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
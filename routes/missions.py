@@ -1,15 +1,61 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Response, status
-from sqlalchemy import text
-from db.database import engine
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from db.database import connect
+from db.statements import statements
+from cache.catalog_cache import catalog_cache, notify_invalidation
+from db.bulk import bulk_insert
 
 from schemas.schemas import (
+    BulkCreateResponse,
+    MissionProgressResponse,
     MissionRequest,
     MissionResponse,
 )
+from schemas.serializers import rows_response
+from cache.http_cache import cache_headers, table_validators
 
 router = APIRouter()
 
+statements.register(
+    "missions.create",
+    """
+    INSERT INTO missions (
+        name, description, event_name, target_count, reward_food,
+        reward_gold, reward_wood, reward_stone, reward_experience
+    )
+    VALUES (
+        :name, :description, :event_name, :target_count, :reward_food,
+        :reward_gold, :reward_wood, :reward_stone, :reward_experience
+    )
+    RETURNING id
+    """,
+)
+statements.register(
+    "missions.list",
+    "SELECT * from missions",
+)
+statements.register(
+    "missions.get",
+    "SELECT * from missions WHERE id=:id",
+)
+statements.register(
+    "missions.user_progress",
+    """
+    SELECT m.id AS mission_id, m.name, m.event_name, m.target_count,
+           COALESCE(p.progress, 0) AS progress,
+           p.completed_at IS NOT NULL AS completed
+    FROM missions m
+    LEFT JOIN user_mission_progress p
+      ON p.mission_id = m.id AND p.user_id = :user_id
+    WHERE m.event_name IS NOT NULL
+    ORDER BY m.id
+    """,
+)
+statements.register(
+    "missions.delete",
+    "DELETE from missions WHERE id = :id",
+)
+
 
 # MISSIONS start missions endpoint
 # POST MISSIONS
@@ -21,39 +67,62 @@ router = APIRouter()
     response_model=MissionResponse,
     tags=["Missions"],
 )
-def create_mission(post_mission: MissionRequest):
-    # Consulta SQL segura con parámetros
-    query = text(
-        "INSERT INTO missions (name, description) VALUES (:name, :description) RETURNING id"
-    )
-    with engine.connect() as con:
+async def create_mission(post_mission: MissionRequest):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(
-                query,
-                {"name": post_mission.name, "description": post_mission.description},
+            result = await statements.execute(
+                con,
+                "missions.create",
+                post_mission.model_dump(mode="json"),
             )
 
             # Obtenemos el ID generado por la base de datos
             mission_id = result.scalar()
-            con.commit()
+            await notify_invalidation(con, "missions", mission_id, "create")
+            await con.commit()
+            catalog_cache.publish("missions", mission_id, "create")
 
             # Devolvemos el nuevo objeto de misión con el ID asignado
-            new_mission = MissionResponse(
-                id=mission_id,
-                name=post_mission.name,
-                description=post_mission.description,
-            )
+            new_mission = MissionResponse(id=mission_id, **post_mission.model_dump())
             return new_mission
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating the mission: {str(e)}",
             )
 
 
+# POST missions bulk
+# This method create many missions in a single transaction using COPY
+# The ids are returned in the same order as the items
+# The parameter is post_missions: List[MissionRequest]
+@router.post(
+    "/missions/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkCreateResponse,
+    tags=["Missions"],
+)
+async def create_missions_bulk(post_missions: List[MissionRequest]):
+    async with connect("writes") as con:
+        try:
+            # Todo el lote ya fue validado por FastAPI antes de llegar aquí
+            ids = await bulk_insert(con, "missions", post_missions)
+            await con.commit()
+        except Exception as e:
+            await con.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"An error occurred while creating the missions: {str(e)}",
+            )
+
+    # Una sola invalidación por lote, no una por item
+    catalog_cache.publish("missions", None, "bulk")
+    return BulkCreateResponse(ids=ids)
+
+
 # GET ALL MISSIONS
 # This method get all missions
 @router.get(
@@ -62,11 +131,16 @@ def create_mission(post_mission: MissionRequest):
     response_model=List[MissionResponse],
     tags=["Missions"],
 )
-def get_all_missions():
-    query = text("SELECT * from missions")
-    with engine.connect() as con:
+async def get_all_missions(request: Request):
+    async with connect("reads", replica=True) as con:
+        # La versión de la tabla se lee antes que el listado: si el cliente ya la
+        # tiene, respondemos 304 sin ejecutar la consulta
+        validators = await table_validators(con, "missions")
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
+
         # Ejecutamos la consulta
-        results = con.execute(query).fetchall()
+        results = (await statements.execute(con, "missions.list")).fetchall()
 
         if not results:  # Si no hay misiones
             raise HTTPException(
@@ -74,7 +148,7 @@ def get_all_missions():
             )
 
         # resultado
-        return results
+        return rows_response(MissionResponse, results, cache_headers(validators))
 
 
 # GET Mission
@@ -86,21 +160,41 @@ def get_all_missions():
     response_model=MissionResponse,
     tags=["Missions"],
 )
-def get_mission(mission_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("SELECT * from missions WHERE id=:id")
-    with engine.connect() as con:
-        # Ejecutamos la consulta con parámetros para evitar inyección SQL
-        result = con.execute(query, {"id": mission_id}).fetchone()
-
-        if result is None:  # Si no se encuentra la mision
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Mission with id {mission_id} not found",
-            )
-
-        # retornarlo como JSON
-        return result
+async def get_mission(mission_id: int):
+    async def load_mission():
+        async with connect("reads") as con:
+            # Ejecutamos la consulta con parámetros para evitar inyección SQL
+            row = (
+                await statements.execute(con, "missions.get", {"id": mission_id})
+            ).fetchone()
+            return dict(row._mapping) if row is not None else None
+
+    # Solo vamos a la base de datos si el item no está en la cache
+    result = await catalog_cache.get("missions", mission_id, load_mission)
+
+    if result is None:  # Si no se encuentra la mision
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Mission with id {mission_id} not found",
+        )
+
+    # retornarlo como JSON
+    return result
+
+
+# GET USER MISSIONS
+# This method get the progress of the user in every mission with criteria
+# The param is user_id
+@router.get(
+    "/users/{user_id}/missions",
+    status_code=status.HTTP_200_OK,
+    response_model=List[MissionProgressResponse],
+    tags=["Missions"],
+)
+async def get_user_missions(user_id: str):
+    async with connect("reads", replica=True) as con:
+        results = await statements.execute(con, "missions.user_progress", {"user_id": user_id})
+        return rows_response(MissionProgressResponse, results)
 
 
 # DELETE
@@ -112,13 +206,15 @@ def get_mission(mission_id: int):
     response_model=MissionResponse,
     tags=["Missions"],
 )
-def delete_mission(mission_id: int):
-    # Consulta SQL segura utilizando parámetros
-    query = text("DELETE from missions WHERE id={0}".format(mission_id))
-    with engine.connect() as con:
+async def delete_mission(mission_id: int):
+    async with connect("writes") as con:
         try:
             # Ejecutamos la consulta con parámetros
-            result = con.execute(query, {"id": mission_id})
+            result = await statements.execute(
+                con,
+                "missions.delete",
+                {"id": mission_id},
+            )
 
             # Confirmamos que se eliminó al menos una fila
             if result.rowcount == 0:
@@ -127,11 +223,13 @@ def delete_mission(mission_id: int):
                     detail=f"Mission with id {mission_id} not found",
                 )
 
-            con.commit()
+            await notify_invalidation(con, "missions", mission_id, "delete")
+            await con.commit()
+            catalog_cache.publish("missions", mission_id, "delete")
             return Response(status_code=status.HTTP_204_NO_CONTENT)
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while deleting the mission: {str(e)}",
@@ -0,0 +1,53 @@
+import anyio
+import orjson
+from fastapi import APIRouter, WebSocket, status
+from authentication.auth import decode_access_token
+from push.push import push_hub
+from routes.users import find_user_by_email
+
+router = APIRouter()
+
+
+# WEBSOCKET RESOURCES
+# This method pushes the resource deltas of the authenticated user (grants,
+# daily bonus, mission rewards) as soon as their transaction commits
+# The param is token, the JWT from /token (browsers cannot set headers here)
+@router.websocket("/ws/resources")
+async def resource_updates(websocket: WebSocket, token: str = ""):
+    payload = decode_access_token(token) if token else None
+    user = None
+    if payload is not None and payload.get("sub"):
+        user = await find_user_by_email(payload["sub"], "auth")
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    with push_hub.subscribe(user.id) as subscription:
+        # Como StreamingResponse: una tarea envía y otra espera el cierre del
+        # cliente; la primera que termina cancela a la otra
+        async with anyio.create_task_group() as task_group:
+
+            async def run_and_cancel(func):
+                await func(websocket, subscription)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(run_and_cancel, wait_disconnect)
+            await run_and_cancel(send_messages)
+
+
+async def send_messages(websocket, subscription):
+    while True:
+        message = await subscription.queue.get()
+        if subscription.overflowed:
+            # Perdió mensajes: que reconecte y relea /users/{user_id}/state
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return
+        await websocket.send_text(orjson.dumps(message).decode())
+
+
+async def wait_disconnect(websocket, subscription):
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
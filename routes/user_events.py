@@ -1,40 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import text
-from db.database import engine
+from datetime import date, datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
+from db.database import connect
+from db.statements import statements
+from missions.progress import apply_event
+from observability.metrics import EVENT_DEDUP
+from routes.users import get_current_user
+from user_events.active_users import ALL_EVENTS, TRACKED_EVENTS, active_users, load_sketches, merge_sketches
+from user_events.dedup import event_digest, event_filter
 from schemas.schemas import (
+    ActiveUsersResponse,
     UserEventResponse,
     UserEventBase,
 )
 
 router = APIRouter()
 
+# ON CONFLICT: si otro worker ya insertó el mismo evento no se devuelve fila
+statements.register(
+    "user_events.create",
+    """
+    INSERT INTO user_events (user_id, event_name, timestamp, dedup_hash)
+    VALUES (:user_id, :event_name, :timestamp, :dedup_hash)
+    ON CONFLICT (dedup_hash) DO NOTHING
+    RETURNING id
+    """,
+)
+statements.register(
+    "user_events.find_by_hash",
+    "SELECT id FROM user_events WHERE dedup_hash = :dedup_hash",
+)
+
 
+# POST USER EVENT
+# This method stores the event and advances the user's missions
+# A retried event (same user_id, event_name and timestamp) is not stored
+# again: the original is returned with 200 and duplicate=true
 @router.post(
     "/user-events/",
     status_code=status.HTTP_201_CREATED,
     response_model=UserEventResponse,
     tags=["User Events"],
 )
-def create_user_event(event: UserEventBase):
-    #  Consulta SQL segura con parámetros
-    query = text(
-        "INSERT INTO user_events (user_id, event_name, timestamp) VALUES (:user_id, :event_name, :timestamp) RETURNING id"
-    )
-    with engine.connect() as con:
+async def create_user_event(event: UserEventBase, response: Response):
+    digest = event_digest(event.user_id, event.event_name, event.timestamp)
+
+    async with connect("writes") as con:
         try:
+            # El filtro descarta sin consultar la base los eventos nuevos; si
+            # dice "visto" lo confirmamos con una lectura en lugar de una escritura
+            if event_filter.might_contain(digest):
+                existing_id = (
+                    await statements.execute(
+                        con, "user_events.find_by_hash", {"dedup_hash": digest}
+                    )
+                ).scalar()
+                if existing_id is not None:
+                    EVENT_DEDUP.labels("duplicate_filter").inc()
+                    return duplicate_event(response, event, existing_id)
+                EVENT_DEDUP.labels("false_positive").inc()
+
             # Ejecutamos la consulta con parámetros
-            result = con.execute(
-                query,
-                {
-                    "user_id": event.user_id,
-                    "event_name": event.event_name,
-                    "timestamp": event.timestamp,
-                },
-            )
+            event_id = (
+                await statements.execute(
+                    con,
+                    "user_events.create",
+                    {
+                        "user_id": event.user_id,
+                        "event_name": event.event_name,
+                        "timestamp": event.timestamp,
+                        "dedup_hash": digest,
+                    },
+                )
+            ).scalar()
 
-            # Obtenemos el ID generado por la base de datos
-            event_id = result.scalar()
-            con.commit()
+            if event_id is None:
+                # Lo insertó otro worker, o es más viejo que la ventana del filtro
+                existing_id = (
+                    await statements.execute(
+                        con, "user_events.find_by_hash", {"dedup_hash": digest}
+                    )
+                ).scalar()
+                await con.rollback()
+                event_filter.add(digest)
+                EVENT_DEDUP.labels("duplicate_database").inc()
+                return duplicate_event(response, event, existing_id)
+
+            # Avanzamos las misiones del usuario en la misma transacción
+            completed_missions = await apply_event(con, event.user_id, event.event_name)
+            await con.commit()
+            event_filter.add(digest)
+            EVENT_DEDUP.labels("new").inc()
+            active_users.record(event.user_id, event.event_name)
 
             # Devolvemos el nuevo objeto de evento con el ID asignado
             new_event = UserEventResponse(
@@ -42,12 +101,75 @@ def create_user_event(event: UserEventBase):
                 user_id=event.user_id,
                 event_name=event.event_name,
                 timestamp=event.timestamp,
+                completed_missions=completed_missions,
             )
             return new_event
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating the event: {str(e)}",
             )
+
+
+def duplicate_event(response, event, event_id):
+    response.status_code = status.HTTP_200_OK
+    return UserEventResponse(
+        id=event_id,
+        user_id=event.user_id,
+        event_name=event.event_name,
+        timestamp=event.timestamp,
+        duplicate=True,
+    )
+
+
+# GET ACTIVE USERS
+# This method estimates the distinct users with at least one event between
+# from and to (inclusive, UTC days), optionally for a single event_name
+# The answer merges one HyperLogLog per day: its cost does not depend on the
+# number of users or events, and its relative error is standard_error
+@router.get(
+    "/user-events/active-users",
+    status_code=status.HTTP_200_OK,
+    response_model=ActiveUsersResponse,
+    tags=["User Events"],
+)
+async def get_active_users(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    event_name: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    # Sin parámetros es el DAU de hoy
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from must not be after to",
+        )
+    max_days = settings.active_users.max_range_days
+    if (end - start).days + 1 > max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The range cannot be longer than {max_days} days",
+        )
+    if event_name is not None and event_name not in TRACKED_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown event_name {event_name}",
+        )
+
+    async with connect("reads", replica=True) as con:
+        blobs = await load_sketches(con, start, end, event_name or ALL_EVENTS)
+
+    # Combinar hasta max_range_days sketches es CPU: fuera del event loop
+    sketch = await run_in_threadpool(merge_sketches, blobs, settings.active_users.precision)
+    return ActiveUsersResponse(
+        start=start,
+        end=end,
+        event_name=event_name,
+        active_users=sketch.count(),
+        standard_error=round(sketch.standard_error, 5),
+    )
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import text
-from db.database import engine
+from fastapi import APIRouter, HTTPException, status
+from db.database import connect
+from db.statements import statements
+from push.push import notify_resource_change
 from schemas.schemas import (
     UserResourceResponse,
     UserResourceBase,
@@ -9,6 +10,36 @@ from schemas.schemas import (
 
 router = APIRouter()
 
+statements.register(
+    "user_resources.create",
+    """
+    INSERT INTO user_resources (user_id, food, gold, wood, stone, experience)
+    VALUES (:user_id, :food, :gold, :wood, :stone, :experience)
+    RETURNING id
+    """,
+)
+statements.register(
+    "user_resources.get",
+    """
+    SELECT id, user_id, food, gold, wood, stone, experience
+    FROM user_resources
+    WHERE user_id = :user_id
+    """,
+)
+statements.register(
+    "user_resources.add",
+    """
+    UPDATE user_resources
+    SET food = food + :food,
+        gold = gold + :gold,
+        wood = wood + :wood,
+        stone = stone + :stone,
+        experience = experience + :experience
+    WHERE user_id = :user_id
+    RETURNING id, user_id, food, gold, wood, stone, experience
+    """,
+)
+
 
 # Crear o inicializar recursos para un usuario
 @router.post(
@@ -17,28 +48,23 @@ router = APIRouter()
     response_model=UserResourceResponse,
     tags=["Resources"],
 )
-def create_user_resources(resource: UserResourceBase):
-    query = text(
-        """
-        INSERT INTO user_resources (user_id, food, gold, wood, stone)
-        VALUES (:user_id, :food, :gold, :wood, :stone)
-        RETURNING id
-        """
-    )
-    with engine.connect() as con:
+async def create_user_resources(resource: UserResourceBase):
+    async with connect("writes") as con:
         try:
-            result = con.execute(
-                query,
+            result = await statements.execute(
+                con,
+                "user_resources.create",
                 {
                     "user_id": resource.user_id,
                     "food": resource.food,
                     "gold": resource.gold,
                     "wood": resource.wood,
                     "stone": resource.stone,
+                    "experience": resource.experience,
                 },
             )
             resource_id = result.scalar()
-            con.commit()
+            await con.commit()
 
             return UserResourceResponse(
                 id=resource_id,
@@ -47,9 +73,10 @@ def create_user_resources(resource: UserResourceBase):
                 gold=resource.gold,
                 wood=resource.wood,
                 stone=resource.stone,
+                experience=resource.experience,
             )
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating resources: {str(e)}",
@@ -63,29 +90,17 @@ def create_user_resources(resource: UserResourceBase):
     response_model=UserResourceResponse,
     tags=["Resources"],
 )
-def update_user_resources(user_id: int, update: UserResourceUpdate):
-    select_query = text(
-        """
-        SELECT id, user_id, food, gold, wood, stone
-        FROM user_resources
-        WHERE user_id = :user_id
-        """
-    )
-    update_query = text(
-        """
-        UPDATE user_resources
-        SET food = food + :food,
-            gold = gold + :gold,
-            wood = wood + :wood,
-            stone = stone + :stone
-        WHERE user_id = :user_id
-        RETURNING id, user_id, food, gold, wood, stone
-        """
-    )
-    with engine.connect() as con:
+async def update_user_resources(user_id: str, update: UserResourceUpdate):
+    async with connect("writes") as con:
         try:
             # Verificar si el usuario tiene recursos inicializados
-            result = con.execute(select_query, {"user_id": user_id}).fetchone()
+            result = (
+                await statements.execute(
+                    con,
+                    "user_resources.get",
+                    {"user_id": user_id},
+                )
+            ).fetchone()
             if not result:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -93,18 +108,24 @@ def update_user_resources(user_id: int, update: UserResourceUpdate):
                 )
 
             # Actualizar los recursos
-            updated_result = con.execute(
-                update_query,
-                {
-                    "user_id": user_id,
-                    "food": update.food,
-                    "gold": update.gold,
-                    "wood": update.wood,
-                    "stone": update.stone,
-                },
+            updated_result = (
+                await statements.execute(
+                    con,
+                    "user_resources.add",
+                    {
+                        "user_id": user_id,
+                        "food": update.food,
+                        "gold": update.gold,
+                        "wood": update.wood,
+                        "stone": update.stone,
+                        "experience": update.experience,
+                    },
+                )
             ).fetchone()
 
-            con.commit()
+            # Avisamos a los clientes conectados cuando la transacción haga commit
+            await notify_resource_change(con, user_id, "grant", update.model_dump())
+            await con.commit()
 
             # Devolver los datos actualizados
             return UserResourceResponse(
@@ -114,9 +135,10 @@ def update_user_resources(user_id: int, update: UserResourceUpdate):
                 gold=updated_result.gold,
                 wood=updated_result.wood,
                 stone=updated_result.stone,
+                experience=updated_result.experience,
             )
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while updating resources: {str(e)}",
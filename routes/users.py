@@ -1,55 +1,90 @@
-import os
-import bcrypt
-import psycopg2
-import jwt
-
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
-from datetime import datetime
-from typing import List
-from sqlalchemy import text
-from psycopg2.extras import RealDictCursor
-from passlib.hash import bcrypt  # Para hashear contraseñas
-from authentication.auth import ALGORITHM, SECRET_KEY
-from schemas.schemas import UserRequest, UserResponse
+from datetime import date, datetime
+from typing import List, Optional
+from authentication.auth import decode_access_token, get_password_hash
+from schemas.schemas import (
+    PlayerStateResponse,
+    UserDeletionJobResponse,
+    UserRequest,
+    UserResponse,
+)
+from schemas.serializers import rows_response
+from cache.http_cache import cache_headers, row_validators, table_validators
 from users.user import User
-from db.database import engine
+from users.deletion import deletion_worker, latest_deletion_job, request_user_deletion
+from users.state import MAX_STATE_EVENTS, STATE_SECTIONS, player_state, state_statement
+from db.database import connect, replica_router
+from db.replicas import current_routing
+from cache.single_flight import single_flight
+from db.statements import statements
 
 router = APIRouter()
 
+statements.register(
+    "users.create",
+    """
+    INSERT INTO users (id, name, email, password, registerdatetime)
+    VALUES (:id, :name, :email, :password, :registerdatetime)
+    RETURNING id
+    """,
+)
+statements.register(
+    "users.email_exists",
+    "SELECT id FROM users WHERE email = :email",
+)
+# Los usuarios dados de baja ya no existen para la API
+statements.register(
+    "users.get_by_email",
+    "SELECT * FROM users WHERE email = :email AND deleted_at IS NULL",
+)
+statements.register(
+    "users.list",
+    "SELECT * FROM users WHERE deleted_at IS NULL",
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def get_db_connection():
-    conn = psycopg2.connect(os.environ["DB_URL"], cursor_factory=RealDictCursor)
-    return conn
+async def find_user_by_email(email: str, route_class: str = "reads"):
+    """Busca el usuario en una réplica y, si no aparece, lo confirma en el primario.
+
+    Un usuario recién creado puede no haber llegado todavía a la réplica.
+    """
+    async with connect(route_class, replica=True) as con:
+        user = (
+            await statements.execute(con, "users.get_by_email", {"email": email})
+        ).fetchone()
+    if user is None and replica_router.replicas:
+        async with connect(route_class) as con:
+            user = (
+                await statements.execute(con, "users.get_by_email", {"email": email})
+            ).fetchone()
+    return user
 
 
 # Dependencia para verificar el token
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            try:
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                username: str = payload.get("sub")
-                if username is None:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                    )
-                # Verificar si el usuario existe en la base de datos
-                cur.execute("SELECT * FROM users WHERE email = %s", (username,))
-                user = cur.fetchone()
-                if user is None:
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="User not found",
-                    )
-                return user
-            except JWTError:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-                )
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    payload = decode_access_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+    username: str = payload.get("sub")
+    if username is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+
+    # Verificar si el usuario existe en la base de datos
+    user = await find_user_by_email(username, "auth")
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+    return dict(user._mapping)
 
 
 # USER start endpoints user
@@ -62,25 +97,17 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     response_model=UserResponse,
     tags=["Users"],
 )
-def create_user(post_user: UserRequest):
-    # Hasheamos la contraseña antes de guardarla
-    hashed_password = bcrypt.hash(post_user.password)
-
-    # Consulta SQL usando parámetros para PostgreSQL
-    query = text(
-        """
-        INSERT INTO users (id, name, email, password, registerdatetime) 
-        VALUES (:id, :name, :email, :password, :registerdatetime)
-        RETURNING id
-    """
-    )
+async def create_user(post_user: UserRequest):
+    # Hasheamos la contraseña antes de guardarla (bcrypt es lento, fuera del event loop)
+    hashed_password = await run_in_threadpool(get_password_hash, post_user.password)
 
-    with engine.connect() as con:
+    async with connect("writes") as con:
         try:
             # Verificamos si el email ya existe
-            email_check_query = text("SELECT id FROM users WHERE email = :email")
-            existing_user = con.execute(
-                email_check_query, {"email": post_user.email}
+            existing_user = (
+                await statements.execute(
+                    con, "users.email_exists", {"email": post_user.email}
+                )
             ).fetchone()
             if existing_user:
                 raise HTTPException(
@@ -89,8 +116,9 @@ def create_user(post_user: UserRequest):
                 )
 
             # Insertamos al nuevo usuario y obtenemos el ID generado
-            result = con.execute(
-                query,
+            result = await statements.execute(
+                con,
+                "users.create",
                 {
                     "id": post_user.id,
                     "name": post_user.name,
@@ -100,7 +128,9 @@ def create_user(post_user: UserRequest):
                 },
             )
             user_id = result.fetchone()[0]
-            con.commit()
+            await con.commit()
+            # En este worker el email deja de ser 404 ya; en los demás, al vencer el TTL
+            single_flight.forget("users", post_user.email)
 
             # Creamos y retornamos el objeto usuario
             new_user = User(**post_user.model_dump())
@@ -109,7 +139,7 @@ def create_user(post_user: UserRequest):
             return new_user
 
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error creating user: {str(e)}",
@@ -125,22 +155,77 @@ def create_user(post_user: UserRequest):
     response_model=UserResponse,
     tags=["Users"],
 )
-def get_user(email: str, current_user: dict = Depends(get_current_user)):
-    # Consulta SQL segura utilizando parámetros
-    query = text("SELECT * FROM users WHERE email = :email")
+async def get_user(
+    email: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
+    # Las peticiones simultáneas por el mismo email comparten una sola consulta.
+    # Quien acaba de escribir lee del primario: no comparte la lectura de una réplica
+    routing = current_routing.get()
+    read_primary = routing is not None and routing.read_primary
+    result = await single_flight.do(
+        ("users", email, read_primary), lambda: find_user_by_email(email)
+    )
 
-    with engine.connect() as con:
-        # Ejecutamos la consulta con parámetros para evitar inyección SQL
-        result = con.execute(query, {"email": email}).fetchone()
+    if result is None:  # Si no se encuentra el usuario
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {email} not found",
+        )
 
-        if result is None:  # Si no se encuentra el usuario
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with id {email} not found",
-            )
+    # ETag y Last-Modified salen de la misma fila: no cuestan otra consulta
+    validators = row_validators("user", result)
+    if validators is not None:
+        if validators.matches(request):
+            return validators.not_modified()
+        response.headers.update(validators.headers)
 
-        #  retornarlo como JSON
-        return result
+    #  retornarlo como JSON
+    return result
+
+
+# GET USER STATE
+# This method returns everything a client needs on boot in one query:
+# user, resources, daily bonus status and recent events
+# The params are user_id, fields (comma separated sections) and events
+@router.get(
+    "/users/{user_id}/state",
+    status_code=status.HTTP_200_OK,
+    response_model=PlayerStateResponse,
+    response_model_exclude_unset=True,
+    tags=["Users"],
+)
+async def get_user_state(
+    user_id: str,
+    fields: Optional[str] = None,
+    events: int = Query(10, ge=0, le=MAX_STATE_EVENTS),
+    current_user: dict = Depends(get_current_user),
+):
+    sections = set(STATE_SECTIONS) if fields is None else set(fields.split(","))
+    if not sections or not sections <= set(STATE_SECTIONS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields, use any of: {', '.join(STATE_SECTIONS)}",
+        )
+
+    statement_name = state_statement(sections)
+    params = {"user_id": user_id, "events_limit": events}
+    async with connect("reads", replica=True) as con:
+        rows = (await statements.execute(con, statement_name, params)).fetchall()
+    # Igual que find_user_by_email: el usuario puede no estar aún en la réplica
+    if not rows and replica_router.replicas:
+        async with connect("reads") as con:
+            rows = (await statements.execute(con, statement_name, params)).fetchall()
+
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found",
+        )
+
+    return player_state(rows, sections, date.today())
 
 
 # GET ALL USERS
@@ -151,13 +236,18 @@ def get_user(email: str, current_user: dict = Depends(get_current_user)):
     response_model=List[UserResponse],
     tags=["Users"],
 )
-def get_all_users(current_user: dict = Depends(get_current_user)):
-    # Consulta SQL segura
-    query = text("SELECT * FROM users")
+async def get_all_users(
+    request: Request, current_user: dict = Depends(get_current_user)
+):
+    async with connect("reads", replica=True) as con:
+        # La versión de la tabla se lee antes que el listado: si el cliente ya la
+        # tiene, respondemos 304 sin ejecutar la consulta
+        validators = await table_validators(con, "users")
+        if validators is not None and validators.matches(request):
+            return validators.not_modified()
 
-    with engine.connect() as con:
         # Ejecutamos la consulta
-        results = con.execute(query).fetchall()
+        results = (await statements.execute(con, "users.list")).fetchall()
 
         if not results:  # Si no hay usuarios
             raise HTTPException(
@@ -165,40 +255,64 @@ def get_all_users(current_user: dict = Depends(get_current_user)):
             )
 
         # Convertimos los resultados a una lista de diccionarios
-        return results
+        return rows_response(UserResponse, results, cache_headers(validators))
 
 
 # DELETE
-# This method DELETE the user by ID
+# This method deactivates the user at once and enqueues a job that deletes
+# their data in small batches; the job is returned with its progress
 # The param is user_id
 @router.delete(
-    "/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Users"]
+    "/users/{user_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=UserDeletionJobResponse,
+    tags=["Users"],
 )
-def delete_user(user_id: int, current_user: dict = Depends(get_current_user)):
-    # Consulta SQL segura utilizando parámetros
-    query = text("DELETE FROM users WHERE id = :id")
-
-    with engine.connect() as con:
+async def delete_user(
+    user_id: str, response: Response, current_user: dict = Depends(get_current_user)
+):
+    async with connect("writes") as con:
         try:
-            # Ejecutamos la consulta con parámetros
-            result = con.execute(query, {"id": user_id})
-
-            # Confirmamos que se eliminó al menos una fila
-            if result.rowcount == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"User with id {user_id} not found",
-                )
-
-            con.commit()
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-
+            job = await request_user_deletion(con, user_id)
+            await con.commit()
         except Exception as e:
-            con.rollback()
+            await con.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while deleting the user: {str(e)}",
             )
 
+    if job is None:  # No existe o ya estaba dado de baja
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found",
+        )
+
+    deletion_worker.wake()
+    response.headers["Location"] = f"/users/{user_id}/deletion"
+    return job
+
+
+# GET USER DELETION
+# This method returns the progress of the latest deletion job of the user
+# The param is user_id
+@router.get(
+    "/users/{user_id}/deletion",
+    status_code=status.HTTP_200_OK,
+    response_model=UserDeletionJobResponse,
+    tags=["Users"],
+)
+async def get_user_deletion(user_id: str, current_user: dict = Depends(get_current_user)):
+    # Del primario: el avance tiene que verse al día
+    async with connect("reads") as con:
+        job = await latest_deletion_job(con, user_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No deletion job found for user {user_id}",
+        )
+    return job
+
 
 # end user
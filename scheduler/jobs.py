@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from cache.building_index import building_index
+from cache.search_index import search_index
+from config.settings import settings
+from db.database import connect
+from db.statements import statements
+from missions.progress import mission_index
+from scheduler.scheduler import CronTrigger, IntervalTrigger
+from user_events.active_users import active_users
+
+# Rachas que ya no pueden seguir: el último login fue antes de ayer
+statements.register(
+    "jobs.expire_streaks",
+    """
+    UPDATE daily_login_bonus
+    SET streak = 0
+    WHERE id IN (
+        SELECT id FROM daily_login_bonus
+        WHERE streak > 0 AND last_login_date < :cutoff
+        LIMIT :batch_size
+    )
+    """,
+)
+# timestamp es texto ISO 8601, así que se compara como texto; cada lote sale
+# de ix_user_events_timestamp
+statements.register(
+    "jobs.purge_old_events",
+    """
+    DELETE FROM user_events
+    WHERE id IN (
+        SELECT id FROM user_events
+        WHERE timestamp < :cutoff
+        ORDER BY timestamp
+        LIMIT :batch_size
+    )
+    """,
+)
+
+
+async def run_in_batches(name, params):
+    """Ejecuta la sentencia `name` lote por lote, cada uno en su transacción."""
+    batch_size = settings.scheduler.batch_size
+    total = 0
+    while True:
+        async with connect("writes") as con:
+            affected = (
+                await statements.execute(con, name, {**params, "batch_size": batch_size})
+            ).rowcount
+            await con.commit()
+        total += affected
+        if affected < batch_size:
+            return total
+        await asyncio.sleep(settings.scheduler.batch_pause_seconds)
+
+
+async def expire_streaks():
+    """Pone en 0 las rachas vencidas, así /users/{user_id}/state no muestra una racha perdida."""
+    # El cron es UTC: el día también, sin importar la zona del servidor
+    today = datetime.now(timezone.utc).date()
+    await run_in_batches("jobs.expire_streaks", {"cutoff": today - timedelta(days=1)})
+
+
+async def purge_old_events():
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.scheduler.event_retention_days)
+    # Los timestamps guardados no llevan zona: se compara sin el sufijo +00:00
+    await run_in_batches(
+        "jobs.purge_old_events", {"cutoff": cutoff.replace(tzinfo=None).isoformat()}
+    )
+
+
+async def warm_caches():
+    """Carga los índices en memoria de este worker y aplica los cambios pendientes.
+
+    Así la primera petición después de una invalidación no paga la recarga.
+    """
+    await building_index.get()
+    await mission_index.get()
+    await search_index.refresh()
+
+
+async def flush_active_users():
+    await active_users.flush()
+
+
+def register_jobs(scheduler):
+    scheduler.add_job(
+        "expire_streaks", expire_streaks, CronTrigger(settings.scheduler.expire_streaks_cron)
+    )
+    if settings.scheduler.event_retention_days > 0:
+        scheduler.add_job(
+            "purge_old_events",
+            purge_old_events,
+            CronTrigger(settings.scheduler.purge_old_events_cron),
+        )
+    # Las caches son por proceso: este job corre en todos los workers
+    scheduler.add_job(
+        "warm_caches",
+        warm_caches,
+        IntervalTrigger(settings.scheduler.warm_caches_interval_seconds),
+        leader=False,
+    )
+    # Cada worker acumula sus propios sketches de usuarios activos
+    scheduler.add_job(
+        "flush_active_users",
+        flush_active_users,
+        IntervalTrigger(settings.active_users.flush_interval_seconds),
+        leader=False,
+    )
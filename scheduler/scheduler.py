@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from db.database import async_engine
+from db.statements import statements
+from observability.metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_RUNS, SCHEDULER_LEADER
+
+logger = logging.getLogger(__name__)
+
+statements.register("scheduler.try_lock", "SELECT pg_try_advisory_lock(:key)")
+
+
+class IntervalTrigger:
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_after(self, moment):
+        return moment + self.interval
+
+
+class CronTrigger:
+    """Expresión cron de 5 campos (minuto hora día mes día-de-semana), en UTC.
+
+    Cada campo acepta *, valores, rangos (1-5), listas (1,15) y pasos (*/10).
+    Como en cron, si día y día de semana están restringidos basta con que
+    coincida uno de los dos.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Invalid cron expression: {expression}")
+        self.expression = expression
+        minutes, hours, days, months, weekdays = (
+            parse_cron_field(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        # 0 y 7 son domingo
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+        # Falla ahora si la expresión nunca se cumple (p. ej. 30 de febrero)
+        self.next_after(datetime.now(timezone.utc))
+
+    def day_matches(self, moment):
+        day = moment.day in self.days
+        # weekday(): lunes es 0; en cron el domingo es 0
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year = candidate.year + candidate.month // 12
+                candidate = candidate.replace(
+                    year=year, month=candidate.month % 12 + 1, day=1, hour=0, minute=0
+                )
+            elif not self.day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+def parse_cron_field(spec, low, high):
+    values = set()
+    for part in spec.split(","):
+        value_range, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if value_range == "*":
+            start, end = low, high
+        elif "-" in value_range:
+            start, end = (int(value) for value in value_range.split("-", 1))
+        else:
+            start = int(value_range)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Invalid cron field: {spec}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def lock_key(name):
+    """Clave de advisory lock estable (64 bits con signo) para el nombre de un job."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class LeaderElection:
+    """Liderazgo por job entre todos los workers con advisory locks de Postgres.
+
+    Los locks son de sesión y viven en una conexión propia del worker: quien
+    toma el lock de un job lo conserva mientras esa conexión siga viva, y los
+    demás workers lo intentan de nuevo en cada disparo. Si la conexión se
+    cae, Postgres libera los locks y otro worker toma el liderazgo. Fuera de
+    Postgres (SQLite en desarrollo) hay un único proceso y siempre es líder.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._con = None
+        self._held = set()
+        self._lock = asyncio.Lock()
+
+    async def is_leader(self, name):
+        if self.engine.dialect.name != "postgresql":
+            return True
+        async with self._lock:
+            try:
+                if self._con is None:
+                    self._con = await self.engine.connect()
+                if name in self._held:
+                    # Seguimos siendo líderes mientras la conexión responda
+                    await self._con.execute(text("SELECT 1"))
+                    acquired = True
+                else:
+                    acquired = (
+                        await statements.execute(
+                            self._con, "scheduler.try_lock", {"key": lock_key(name)}
+                        )
+                    ).scalar()
+                # Los locks de sesión sobreviven al commit; no queda una transacción abierta
+                await self._con.commit()
+            except Exception as e:
+                logger.warning("Leader election connection failed: %s", e)
+                await self._drop_connection()
+                return False
+
+            if acquired:
+                self._held.add(name)
+            SCHEDULER_LEADER.labels(name).set(1 if acquired else 0)
+            return bool(acquired)
+
+    async def release_all(self):
+        async with self._lock:
+            await self._drop_connection()
+
+    async def _drop_connection(self):
+        for name in self._held:
+            SCHEDULER_LEADER.labels(name).set(0)
+        self._held.clear()
+        con, self._con = self._con, None
+        if con is not None:
+            try:
+                # Cerrarla de verdad (no devolverla al pool) suelta los locks
+                await con.invalidate()
+                await con.close()
+            except Exception:
+                pass
+
+
+class Job:
+    def __init__(self, name, func, trigger, max_instances=1, leader=True):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_instances = max_instances
+        self.leader = leader
+        self.running = 0
+
+
+class Scheduler:
+    """Ejecuta jobs periódicos dentro del proceso, fuera de las peticiones.
+
+    Cada job tiene su trigger (IntervalTrigger o CronTrigger) y un máximo de
+    ejecuciones simultáneas en el worker; si un disparo llega con ese máximo
+    alcanzado, se saltea. Los jobs con leader=True corren en un solo worker
+    de toda la flota (ver LeaderElection); los de leader=False, en todos.
+    """
+
+    def __init__(self, engine):
+        self.jobs = {}
+        self.election = LeaderElection(engine)
+        self._tasks = []
+        self._running = set()
+
+    def add_job(self, name, func, trigger, max_instances=1, leader=True):
+        if name in self.jobs:
+            raise ValueError(f"Job {name} is already registered")
+        self.jobs[name] = Job(name, func, trigger, max_instances, leader)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._schedule(job)) for job in self.jobs.values()]
+
+    async def stop(self):
+        tasks = self._tasks + list(self._running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        await self.election.release_all()
+
+    async def _schedule(self, job):
+        next_run = job.trigger.next_after(datetime.now(timezone.utc))
+        while True:
+            await asyncio.sleep(max(0.0, (next_run - datetime.now(timezone.utc)).total_seconds()))
+            # Si el proceso estuvo detenido, los disparos perdidos no se recuperan
+            next_run = job.trigger.next_after(max(next_run, datetime.now(timezone.utc)))
+
+            if job.running >= job.max_instances:
+                SCHEDULER_JOB_RUNS.labels(job.name, "skipped").inc()
+                continue
+            job.running += 1
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job):
+        try:
+            if job.leader and not await self.election.is_leader(job.name):
+                SCHEDULER_JOB_RUNS.labels(job.name, "not_leader").inc()
+                return
+            start = time.perf_counter()
+            try:
+                await job.func()
+            except Exception:
+                SCHEDULER_JOB_RUNS.labels(job.name, "failure").inc()
+                logger.exception("Scheduled job %s failed", job.name)
+            else:
+                SCHEDULER_JOB_RUNS.labels(job.name, "success").inc()
+            finally:
+                SCHEDULER_JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+        finally:
+            job.running -= 1
+
+
+scheduler = Scheduler(async_engine)
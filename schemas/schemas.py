@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from UserEventEnum.UserEventEnum import UserEventEnum
 
 
 # USER
@@ -9,20 +12,33 @@ class UserBase(BaseModel):
     registerdatetime: str
     id: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserRequest(UserBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserResponse(UserBase):
     id: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserDeletionJobResponse(BaseModel):
+    id: int
+    user_id: str
+    status: str
+    current_table: Optional[str] = None
+    deleted_rows: int
+    attempts: int
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime.datetime] = None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    finished_at: Optional[datetime.datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 # USER_EVENTS
@@ -31,20 +47,30 @@ class UserEventBase(BaseModel):
     event_name: str
     timestamp: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserEventRequest(UserEventBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserEventResponse(UserEventBase):
     id: int
+    completed_missions: List[int] = []
+    # True si el evento ya existía: se devuelve el original sin volver a aplicarlo
+    duplicate: bool = False
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ActiveUsersResponse(BaseModel):
+    start: datetime.date
+    end: datetime.date
+    event_name: Optional[str] = None
+    # Estimación de HyperLogLog: usuarios distintos con algún evento en el rango
+    active_users: int
+    # Error relativo típico de la estimación (1.04 / sqrt(registros))
+    standard_error: float
 
 
 # USER_RESOURCES
@@ -54,6 +80,7 @@ class UserResourceBase(BaseModel):
     gold: int = 0
     wood: int = 0
     stone: int = 0
+    experience: int = 0
 
 
 class UserResourceUpdate(BaseModel):
@@ -61,13 +88,13 @@ class UserResourceUpdate(BaseModel):
     gold: int = 0
     wood: int = 0
     stone: int = 0
+    experience: int = 0
 
 
 class UserResourceResponse(UserResourceBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # USER_RESOURCES
 class DailyBonusResponse(BaseModel):
@@ -75,25 +102,74 @@ class DailyBonusResponse(BaseModel):
     bonus: dict
     streak: int
 
+# PLAYER STATE
+class PlayerStateUser(BaseModel):
+    id: str
+    name: str
+    email: str
+    registerdatetime: str
+
+
+class PlayerStateResources(BaseModel):
+    food: int
+    gold: int
+    wood: int
+    stone: int
+    experience: int
+
+
+class PlayerStateBonus(BaseModel):
+    last_login_date: Optional[datetime.date]
+    streak: int
+    claimable: bool
+    next_streak: int
+
+
+class PlayerStateEvent(BaseModel):
+    id: int
+    event_name: str
+    timestamp: str
+
+
+class PlayerStateResponse(BaseModel):
+    user: Optional[PlayerStateUser] = None
+    resources: Optional[PlayerStateResources] = None
+    daily_bonus: Optional[PlayerStateBonus] = None
+    recent_events: Optional[List[PlayerStateEvent]] = None
+
+
 # MISSION
 class MissionBase(BaseModel):
     name: str
     description: str
+    event_name: Optional[UserEventEnum] = None
+    target_count: int = Field(1, ge=1)
+    reward_food: int = 0
+    reward_gold: int = 0
+    reward_wood: int = 0
+    reward_stone: int = 0
+    reward_experience: int = 0
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MissionRequest(MissionBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MissionResponse(MissionBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MissionProgressResponse(BaseModel):
+    mission_id: int
+    name: str
+    event_name: Optional[str]
+    progress: int
+    target_count: int
+    completed: bool
 
 
 # BUILD
@@ -104,20 +180,17 @@ class BuildBase(BaseModel):
     preview_build: str
     experience_require: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BuildRequest(BuildBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BuildResponse(BuildBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # CHARACTER
@@ -125,39 +198,64 @@ class CharacterBase(BaseModel):
     name: str
     description: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CharacterRequest(CharacterBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CharacterResponse(CharacterBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # CELEBRATION
 class CelebrationBase(BaseModel):
     name: str
     description: str
-    date: str
+    date: datetime.date
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CelebrationRequest(CelebrationBase):
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CelebrationResponse(CelebrationBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# CATALOG BULK
+class BulkCreateResponse(BaseModel):
+    ids: List[int]
+
+
+# CATALOG SEARCH
+class CatalogSearchResult(BaseModel):
+    type: str
+    id: int
+    name: str
+    description: str
+    score: float
+
+
+class StatementStats(BaseModel):
+    name: str
+    sql: str
+    calls: int
+    total_ms: float
+    avg_ms: float
+
+
+class SlowQueryEntry(BaseModel):
+    captured_at: str
+    route: Optional[str]
+    duration_ms: float
+    sql: str
+    params: Any
+    plan: Optional[List[str]]
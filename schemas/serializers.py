@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class RowSerializer:
+    """Serializa filas de la base a JSON con un response model.
+
+    El TypeAdapter de List[model] se construye una sola vez por modelo: las
+    filas pasan por la misma validación y conversión de tipos que el
+    response_model de la ruta (enums, fechas, campos faltantes), pero el
+    validador y el serializador ya están compilados y el JSON sale directo de
+    pydantic-core, sin el paso intermedio por jsonable_encoder.
+    """
+
+    def __init__(self, model):
+        self.adapter = TypeAdapter(List[model])
+
+    def encode(self, rows):
+        # Acepta Row de SQLAlchemy o diccionarios ya armados
+        items = [dict(getattr(row, "_mapping", row)) for row in rows]
+        return self.adapter.dump_json(self.adapter.validate_python(items), by_alias=True)
+
+
+@lru_cache(maxsize=None)
+def row_serializer(model):
+    return RowSerializer(model)
+
+
+def rows_response(model, rows, headers=None):
+    """Respuesta JSON de una lista de filas con la forma de `model`.
+
+    Al devolver un Response, FastAPI no vuelve a pasar el resultado por el
+    response_model de la ruta: la validación la hace row_serializer.
+    """
+    return Response(
+        content=row_serializer(model).encode(rows),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# db.database crea los engines al importarse: sin DB_URL las pruebas usan un
+# SQLite descartable
+os.environ.setdefault("DB_URL", f"sqlite:///{tempfile.mkdtemp()}/tests.db")
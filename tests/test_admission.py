@@ -0,0 +1,123 @@
+import asyncio
+
+from dynaconf.utils.boxing import DynaBox
+
+from admission.admission import AdmissionControlMiddleware, ConcurrencyLimiter
+from authentication.auth import create_access_token
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_get_the_slot_in_arrival_order():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=10, timeout=5)
+        assert await limiter.acquire()
+        order = []
+
+        async def request(name):
+            assert await limiter.acquire()
+            order.append(name)
+
+        tasks = [asyncio.ensure_future(request(name)) for name in "abc"]
+        await settle()
+        # Con gente en cola, una petición nueva no pasa aunque se libere un lugar
+        late = asyncio.ensure_future(request("late"))
+        for _ in range(4):
+            limiter.release()
+            await settle()
+        await asyncio.gather(*tasks, late)
+        assert order == ["a", "b", "c", "late"]
+        assert limiter.active == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_and_timeout_reject():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, timeout=0.05)
+        assert await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await settle()
+        assert not await limiter.acquire()
+        assert not await waiting
+        assert not limiter._waiters
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=10, timeout=5)
+        assert await limiter.acquire()
+        gone = asyncio.ensure_future(limiter.acquire())
+        next_in_line = asyncio.ensure_future(limiter.acquire())
+        await settle()
+        gone.cancel()
+        await settle()
+        limiter.release()
+        assert await next_in_line
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_returned():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=10, timeout=5)
+        assert await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await settle()
+        # Le pasan el lugar y el cliente se va antes de que la tarea lo vea
+        limiter.release()
+        waiting.cancel()
+        await settle()
+        # Según la versión, wait_for cancela la espera o devuelve el lugar
+        # ya entregado; en ningún caso el lugar se pierde
+        if not waiting.cancelled():
+            assert waiting.result()
+            limiter.release()
+        assert limiter.active == 0
+        assert await limiter.acquire()
+
+    asyncio.run(scenario())
+
+
+def admission(user_burst=1, ip_rate=0):
+    limits = {"concurrency": 1, "queue": 1, "timeout": 1}
+    settings = DynaBox({
+        "auth": limits, "reads": limits, "writes": limits,
+        "user_rate": 0.001, "user_burst": user_burst,
+        "ip_rate": ip_rate, "ip_burst": 1, "trusted_proxies": 0,
+    })
+    return AdmissionControlMiddleware(None, settings)
+
+
+def scope(token=None, ip="10.0.0.1"):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return {"type": "http", "headers": headers, "client": (ip, 1234)}
+
+
+def test_user_bucket_keyed_on_validated_subject():
+    middleware = admission()
+    token = create_access_token({"sub": "ana@example.com"})
+    assert middleware.rate_limit_wait(scope(token)) == 0
+    assert middleware.rate_limit_wait(scope(token)) > 0
+    # Un token inventado no abre un bucket propio
+    assert middleware.token_subject(scope("not-a-jwt")) is None
+    assert middleware.rate_limit_wait(scope("not-a-jwt")) == 0
+    assert "not-a-jwt" not in middleware.user_buckets._buckets
+
+
+def test_rejected_request_is_not_charged_to_the_ip_bucket():
+    middleware = admission(ip_rate=0.001)
+    token = create_access_token({"sub": "ana@example.com"})
+    assert middleware.rate_limit_wait(scope(token)) == 0
+    # El usuario ya no tiene tokens: su IP no debe pagar el rechazo
+    assert middleware.rate_limit_wait(scope(token, ip="10.0.0.2")) > 0
+    assert middleware.rate_limit_wait(scope(ip="10.0.0.2")) == 0
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from cache.building_index import BuildingIndex
+
+
+def brute_force(rows, experience, gold):
+    matches = [row for row in rows if row["experience_require"] <= experience and row["cost"] <= gold]
+    return sorted(matches, key=lambda row: (row["experience_require"], row["cost"], row["id"]))
+
+
+@pytest.fixture(scope="module")
+def rows():
+    rng = random.Random(28)
+    return [
+        {"id": i, "experience_require": rng.choice([0, 10, 10, 50, 200]), "cost": rng.randint(0, 100)}
+        for i in range(1, 200)
+    ]
+
+
+def test_matches_linear_scan(rows):
+    index = BuildingIndex(rows)
+    for experience in (-1, 0, 9, 10, 49, 50, 199, 200, 10_000):
+        for gold in (-1, 0, 1, 50, 99, 100, 1_000):
+            assert index.available(experience, gold) == brute_force(rows, experience, gold)
+
+
+def test_bounds_are_inclusive():
+    index = BuildingIndex([
+        {"id": 1, "experience_require": 5, "cost": 30},
+        {"id": 2, "experience_require": 5, "cost": 30},
+        {"id": 3, "experience_require": 6, "cost": 10},
+    ])
+    assert [row["id"] for row in index.available(5, 30)] == [1, 2]
+    assert [row["id"] for row in index.available(5, 29)] == []
+    assert [row["id"] for row in index.available(6, 30)] == [1, 2, 3]
+
+
+def test_empty_catalog():
+    assert BuildingIndex([]).available(100, 100) == []
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import buildings.build  # noqa: F401  (create_all crea buildings)
+from db.database import Base, engine
+from main import app
+from routes.buildings import parse_building_cursor
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    with engine.begin() as con:
+        con.execute(text("DELETE FROM buildings"))
+        con.execute(
+            text(
+                "INSERT INTO buildings (name, description, cost, preview_build, experience_require) "
+                "VALUES (:name, 'd', :cost, 'p', :xp)"
+            ),
+            # Costos repetidos: el id tiene que desempatar entre páginas
+            [{"name": f"b{i}", "cost": rng.randint(1, 5), "xp": rng.randint(0, 3)} for i in range(37)],
+        )
+    return TestClient(app)
+
+
+def walk(client, **params):
+    ids, after = [], None
+    while True:
+        query = dict(params, limit=5, **({"after": after} if after else {}))
+        response = client.get("/buildings", params=query)
+        assert response.status_code == 200
+        ids.extend(item["id"] for item in response.json())
+        after = response.headers.get("x-next-cursor")
+        if after is None:
+            return ids
+
+
+def all_rows():
+    with engine.connect() as con:
+        return con.execute(text("SELECT id, cost, experience_require FROM buildings")).fetchall()
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "cost", "-cost", "experience_require"])
+def test_pages_cover_every_row_once_in_order(client, sort):
+    column = sort.lstrip("-")
+    key = (lambda row: row.id) if column == "id" else (lambda row: (getattr(row, column), row.id))
+    expected = [row.id for row in sorted(all_rows(), key=key, reverse=sort.startswith("-"))]
+    assert walk(client, sort=sort) == expected
+
+
+def test_pages_respect_filters(client):
+    expected = [row.id for row in sorted(all_rows(), key=lambda row: (row.cost, row.id)) if row.cost <= 3]
+    assert walk(client, sort="cost", max_cost=3) == expected
+
+
+def test_parse_cursor():
+    assert parse_building_cursor("5:12") == (5, 12)
+
+
+@pytest.mark.parametrize("cursor", ["", "5", "a:1", "1:2:3"])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        parse_building_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduler.scheduler import CronTrigger, lock_key, parse_cron_field
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def brute_force(trigger, moment):
+    """Siguiente minuto que cumple la expresión, probando de a uno."""
+    candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    while not (
+        candidate.month in trigger.months
+        and trigger.day_matches(candidate)
+        and candidate.hour in trigger.hours
+        and candidate.minute in trigger.minutes
+    ):
+        candidate += timedelta(minutes=1)
+    return candidate
+
+
+@pytest.mark.parametrize(
+    "expression, moment, expected",
+    [
+        # Siempre estrictamente después, alineado al minuto
+        ("* * * * *", utc(2026, 3, 1, 12, 0, 0), utc(2026, 3, 1, 12, 1)),
+        ("* * * * *", utc(2026, 3, 1, 12, 0, 59, 999999), utc(2026, 3, 1, 12, 1)),
+        # Fin de mes y fin de año
+        ("5 0 * * *", utc(2026, 1, 31, 0, 5), utc(2026, 2, 1, 0, 5)),
+        ("5 0 * * *", utc(2026, 12, 31, 23, 59), utc(2027, 1, 1, 0, 5)),
+        ("0 0 1 * *", utc(2026, 12, 15, 8, 0), utc(2027, 1, 1, 0, 0)),
+        ("30 3 31 * *", utc(2026, 4, 1), utc(2026, 5, 31, 3, 30)),
+        ("0 12 * 2 *", utc(2026, 3, 1), utc(2027, 2, 1, 12, 0)),
+        # 29 de febrero: salta al próximo bisiesto
+        ("0 0 29 2 *", utc(2026, 1, 1), utc(2028, 2, 29, 0, 0)),
+        # Día y día de semana restringidos: basta con uno (2026-10-19 es lunes)
+        ("0 9 1 * 1", utc(2026, 10, 19, 10, 0), utc(2026, 10, 26, 9, 0)),
+        ("0 9 1 * 1", utc(2026, 10, 26, 10, 0), utc(2026, 11, 1, 9, 0)),
+        # Con día en *, solo cuenta el día de semana; 0 y 7 son domingo
+        ("0 9 * * 0", utc(2026, 10, 19), utc(2026, 10, 25, 9, 0)),
+        ("0 9 * * 7", utc(2026, 10, 19), utc(2026, 10, 25, 9, 0)),
+        # Con día de semana en *, solo cuenta el día
+        ("0 9 20 * *", utc(2026, 10, 19), utc(2026, 10, 20, 9, 0)),
+        ("*/15 9-10 * * 1-5", utc(2026, 10, 23, 10, 50), utc(2026, 10, 26, 9, 0)),
+    ],
+)
+def test_next_after(expression, moment, expected):
+    trigger = CronTrigger(expression)
+    assert trigger.next_after(moment) == expected
+    assert brute_force(trigger, moment) == expected
+
+
+def test_consecutive_runs_match_brute_force():
+    trigger = CronTrigger("*/20 */6 1,15 * 6")
+    moment = utc(2026, 12, 20)
+    for _ in range(50):
+        following = trigger.next_after(moment)
+        assert following == brute_force(trigger, moment)
+        moment = following
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["", "* * * *", "* * * * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+     "* * * * 8", "5-1 * * * *", "*/0 * * * *", "a * * * *", "0 0 30 2 *", "0 0 31 4,6,9,11 *"],
+)
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronTrigger(expression)
+
+
+def test_parse_cron_field():
+    assert parse_cron_field("*/15", 0, 59) == {0, 15, 30, 45}
+    assert parse_cron_field("1-5,20", 0, 59) == {1, 2, 3, 4, 5, 20}
+    assert parse_cron_field("50/5", 0, 59) == {50, 55}
+
+
+def test_lock_key_is_stable_signed_64_bits():
+    assert lock_key("expire_streaks") == lock_key("expire_streaks")
+    assert lock_key("expire_streaks") != lock_key("purge_old_events")
+    assert -(2 ** 63) <= lock_key("expire_streaks") < 2 ** 63
@@ -0,0 +1,83 @@
+import pytest
+
+import user_events.dedup as dedup
+from user_events.dedup import BloomFilter, WindowedBloomFilter, event_digest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dedup.time, "monotonic", clock)
+    return clock
+
+
+def digests(prefix, count):
+    return [event_digest(f"{prefix}{i}", "login", "2026-10-19T00:00:00") for i in range(count)]
+
+
+def test_digest_separates_fields():
+    assert event_digest("a", "bc", "t") != event_digest("ab", "c", "t")
+    assert len(event_digest("a", "b", "t")) == 16
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(10_000, 7)
+    added = digests("user", 1000)
+    for digest in added:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in added)
+
+
+def test_no_false_negatives_across_a_rotation(clock):
+    window = WindowedBloomFilter(1000, 0.01, window=60)
+    early = digests("early", 500)
+    late = digests("late", 500)
+    for digest in early:
+        window.add(digest)
+    clock.now += 59.9
+    for digest in late:
+        window.add(digest)
+
+    # Rota: lo visto en la ventana anterior sigue contando
+    clock.now += 0.2
+    assert all(window.might_contain(digest) for digest in early + late)
+
+    newer = digests("newer", 500)
+    for digest in newer:
+        window.add(digest)
+    # Segunda rotación: lo de hace más de dos ventanas se olvida, lo de la última no
+    clock.now += 60
+    assert all(window.might_contain(digest) for digest in newer)
+    assert sum(window.might_contain(digest) for digest in early + late) < 50
+
+
+def test_idle_for_two_windows_forgets_everything(clock):
+    window = WindowedBloomFilter(1000, 0.01, window=60)
+    seen = digests("user", 500)
+    for digest in seen:
+        window.add(digest)
+    clock.now += 120
+    assert sum(window.might_contain(digest) for digest in seen) < 50
+
+
+def test_false_positive_rate_close_to_target(clock):
+    window = WindowedBloomFilter(10_000, 0.01, window=60)
+    for digest in digests("seen", 10_000):
+        window.add(digest)
+    # La consulta mira dos filtros, pero el anterior está vacío
+    false_positives = sum(window.might_contain(digest) for digest in digests("unseen", 20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_sizing():
+    window = WindowedBloomFilter(1_000_000, 0.001, window=600)
+    assert window.hashes == 10
+    assert 3_500_000 < window.memory_bytes < 3_700_000
@@ -0,0 +1,77 @@
+import pytest
+
+from user_events.active_users import merge_sketches
+from user_events.hll import HyperLogLog
+
+
+def sketch_of(values, precision=14):
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def users(start, end):
+    return [f"user-{i}" for i in range(start, end)]
+
+
+@pytest.mark.parametrize("precision", [10, 14])
+@pytest.mark.parametrize("cardinality", [0, 1, 100, 5_000, 100_000])
+def test_estimate_within_error_bound(precision, cardinality):
+    sketch = sketch_of(users(0, cardinality), precision)
+    # Cuatro errores típicos: la prueba no falla por mala suerte
+    tolerance = max(1, 4 * sketch.standard_error * cardinality)
+    assert abs(sketch.count() - cardinality) <= tolerance
+
+
+def test_duplicates_do_not_count():
+    sketch = sketch_of(users(0, 1000) * 5)
+    assert sketch.count() == sketch_of(users(0, 1000)).count()
+
+
+def test_merge_is_the_sketch_of_the_union():
+    monday = sketch_of(users(0, 30_000))
+    tuesday = sketch_of(users(20_000, 50_000))
+    union = sketch_of(users(0, 50_000))
+    monday.merge(tuesday)
+    assert monday.registers == union.registers
+    assert abs(monday.count() - 50_000) <= 4 * monday.standard_error * 50_000
+
+
+def test_merge_is_idempotent():
+    sketch = sketch_of(users(0, 10_000))
+    before = bytes(sketch.registers)
+    sketch.merge(sketch_of(users(0, 10_000)))
+    assert bytes(sketch.registers) == before
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(14).merge(HyperLogLog(12))
+
+
+def test_bytes_round_trip():
+    sketch = sketch_of(users(0, 2_000), precision=12)
+    data = sketch.to_bytes()
+    restored = HyperLogLog.from_bytes(data)
+    assert restored.precision == 12
+    assert restored.registers == sketch.registers
+    # Pocos usuarios: comprimido ocupa mucho menos que los 2^precision registros
+    assert len(sketch_of(users(0, 10)).to_bytes()) < 1_000
+
+
+def test_merge_sketches_of_stored_days():
+    days = [sketch_of(users(day * 1000, day * 1000 + 1500)).to_bytes() for day in range(7)]
+    merged = merge_sketches(days, 14)
+    assert merged.registers == sketch_of(users(0, 7_500)).registers
+
+
+@pytest.mark.parametrize("precision", [3, 19])
+def test_invalid_precision(precision):
+    with pytest.raises(ValueError):
+        HyperLogLog(precision)
+
+
+def test_registers_must_match_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10, bytes(100))
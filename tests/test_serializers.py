@@ -0,0 +1,61 @@
+import datetime
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from schemas.schemas import CelebrationResponse, MissionResponse
+from schemas.serializers import rows_response
+
+# Como llegan de SQLite: fechas como texto y enums como str
+MISSIONS = [
+    {"id": 1, "name": "Mesa", "description": "Abrí una mesa", "event_name": "click_table",
+     "target_count": 3, "reward_food": 0, "reward_gold": 10, "reward_wood": 0,
+     "reward_stone": 0, "reward_experience": 5},
+    {"id": 2, "name": "Sin evento", "description": "ñandú", "event_name": None,
+     "target_count": 1, "reward_food": 1, "reward_gold": 0, "reward_wood": 0,
+     "reward_stone": 0, "reward_experience": 0},
+]
+CELEBRATIONS = [
+    {"id": 1, "name": "Feria", "description": "Flores", "date": "2024-08-01"},
+    {"id": 2, "name": "Año nuevo", "description": "", "date": datetime.date(2025, 1, 1)},
+]
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/model/missions", response_model=List[MissionResponse])
+    def missions_model():
+        return MISSIONS
+
+    @app.get("/rows/missions")
+    def missions_rows():
+        return rows_response(MissionResponse, MISSIONS)
+
+    @app.get("/model/celebrations", response_model=List[CelebrationResponse])
+    def celebrations_model():
+        return CELEBRATIONS
+
+    @app.get("/rows/celebrations")
+    def celebrations_rows():
+        return rows_response(CelebrationResponse, CELEBRATIONS)
+
+    return TestClient(app)
+
+
+def test_rows_response_matches_response_model():
+    client = make_client()
+    for resource in ("missions", "celebrations"):
+        expected = client.get(f"/model/{resource}")
+        actual = client.get(f"/rows/{resource}")
+        assert actual.status_code == expected.status_code == 200
+        assert actual.content == expected.content
+
+
+def test_rows_response_validates_rows():
+    row = dict(MISSIONS[0], event_name="not_an_event")
+    with pytest.raises(ValidationError):
+        rows_response(MissionResponse, [row])
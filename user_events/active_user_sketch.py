@@ -0,0 +1,13 @@
+from db.database import Base
+from sqlalchemy import Column, Date, DateTime, LargeBinary, String, func
+
+
+class ActiveUserSketch(Base):
+    __tablename__ = "active_user_sketches"
+
+    day = Column(Date, primary_key=True)
+    # "" para todos los eventos; si no, el nombre del evento
+    event_name = Column(String, primary_key=True, server_default="")
+    # HyperLogLog.to_bytes(); NULL mientras la fila recién se crea
+    registers = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
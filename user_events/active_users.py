@@ -0,0 +1,179 @@
+import logging
+from datetime import date, datetime, timezone
+
+import user_events.active_user_sketch  # noqa: F401  (create_all crea active_user_sketches)
+from config.settings import settings
+from db.database import connect
+from db.statements import statements
+from observability.metrics import ACTIVE_USERS_FLUSHES
+from user_events.hll import HyperLogLog
+from UserEventEnum.UserEventEnum import UserEventEnum
+
+logger = logging.getLogger(__name__)
+
+# event_name del sketch que cuenta todos los eventos
+ALL_EVENTS = ""
+# Solo los eventos conocidos tienen sketch propio, así un event_name
+# arbitrario no crea filas ni sketches en memoria
+TRACKED_EVENTS = frozenset(event.value for event in UserEventEnum)
+
+statements.register(
+    "active_users.ensure",
+    """
+    INSERT INTO active_user_sketches (day, event_name)
+    VALUES (:day, :event_name)
+    ON CONFLICT (day, event_name) DO NOTHING
+    """,
+)
+statements.register(
+    "active_users.get",
+    "SELECT registers FROM active_user_sketches WHERE day = :day AND event_name = :event_name",
+)
+statements.register(
+    "active_users.lock",
+    """
+    SELECT registers FROM active_user_sketches
+    WHERE day = :day AND event_name = :event_name
+    FOR UPDATE
+    """,
+)
+statements.register(
+    "active_users.update",
+    """
+    UPDATE active_user_sketches
+    SET registers = :registers, updated_at = CURRENT_TIMESTAMP
+    WHERE day = :day AND event_name = :event_name
+    """,
+)
+statements.register(
+    "active_users.range",
+    """
+    SELECT registers FROM active_user_sketches
+    WHERE event_name = :event_name
+      AND day BETWEEN :start AND :end
+      AND registers IS NOT NULL
+    """,
+)
+# timestamp es texto ISO 8601: se compara como texto y el día son sus 10 primeros caracteres
+statements.register(
+    "active_users.events_since",
+    """
+    SELECT id, user_id, event_name, timestamp FROM user_events
+    WHERE id > :after_id AND timestamp >= :since
+    ORDER BY id
+    LIMIT :batch_size
+    """,
+)
+
+
+class ActiveUserSketches:
+    """Usuarios activos por día (UTC) y evento, acumulados en memoria.
+
+    Cada evento nuevo se agrega al sketch de su día para todos los eventos y
+    al de su event_name. `flush` combina lo pendiente con las filas de
+    active_user_sketches: como combinar es tomar el máximo por registro, no
+    importa cuántos workers escriban el mismo día ni si un sketch se combina
+    dos veces después de un fallo.
+    """
+
+    def __init__(self, precision):
+        self.precision = precision
+        self.pending = {}
+
+    def record(self, user_id, event_name, day=None):
+        day = day or datetime.now(timezone.utc).date()
+        keys = [(day, ALL_EVENTS)]
+        if event_name in TRACKED_EVENTS:
+            keys.append((day, event_name))
+        for key in keys:
+            sketch = self.pending.get(key)
+            if sketch is None:
+                sketch = self.pending[key] = HyperLogLog(self.precision)
+            sketch.add(user_id)
+
+    async def flush(self):
+        """Combina los sketches pendientes con la base; devuelve cuántos escribió."""
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        try:
+            async with connect("writes") as con:
+                # SQLite no tiene FOR UPDATE: ahí las escrituras ya son de a una
+                lock = "active_users.lock" if con.dialect.name == "postgresql" else "active_users.get"
+                # Mismo orden en todos los workers, así los locks de fila no se cruzan
+                for day, event_name in sorted(pending):
+                    params = {"day": day, "event_name": event_name}
+                    await statements.execute(con, "active_users.ensure", params)
+                    stored = (await statements.execute(con, lock, params)).scalar()
+                    sketch = pending[(day, event_name)]
+                    if stored is not None:
+                        sketch.merge(HyperLogLog.from_bytes(stored))
+                    await statements.execute(
+                        con, "active_users.update", {**params, "registers": sketch.to_bytes()}
+                    )
+                await con.commit()
+        except Exception:
+            ACTIVE_USERS_FLUSHES.labels("failure").inc()
+            logger.exception("Active user sketches flush failed")
+            # Se reintentan en el próximo flush junto con lo que llegó mientras tanto
+            for key, sketch in pending.items():
+                current = self.pending.get(key)
+                if current is not None:
+                    sketch.merge(current)
+                self.pending[key] = sketch
+            raise
+        ACTIVE_USERS_FLUSHES.labels("success").inc()
+        return len(pending)
+
+
+async def rebuild_from_events(since, batch_size=10_000):
+    """Agrega a los sketches los eventos guardados desde `since` (fecha).
+
+    Sirve para los días anteriores a los sketches o perdidos por un worker
+    que se cayó sin hacer flush. El día sale del timestamp del evento y no
+    de cuándo llegó; volver a correrlo no cambia nada. Devuelve cuántos
+    eventos leyó.
+    """
+    sketches = ActiveUserSketches(settings.active_users.precision)
+    after_id = 0
+    total = 0
+    while True:
+        async with connect("bulk") as con:
+            rows = (
+                await statements.execute(
+                    con,
+                    "active_users.events_since",
+                    {"after_id": after_id, "since": since.isoformat(), "batch_size": batch_size},
+                )
+            ).fetchall()
+        for row in rows:
+            try:
+                day = date.fromisoformat(row.timestamp[:10])
+            except ValueError:
+                continue
+            sketches.record(row.user_id, row.event_name, day)
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+        after_id = rows[-1].id
+    await sketches.flush()
+    return total
+
+
+async def load_sketches(con, start, end, event_name=ALL_EVENTS):
+    """Sketches guardados de `start` a `end` (inclusive), uno por día con actividad."""
+    rows = await statements.execute(
+        con, "active_users.range", {"start": start, "end": end, "event_name": event_name}
+    )
+    return [row.registers for row in rows]
+
+
+def merge_sketches(blobs, precision):
+    """Sketch de la unión de los días: su count() son los usuarios distintos del rango."""
+    sketch = HyperLogLog(precision)
+    for blob in blobs:
+        sketch.merge(HyperLogLog.from_bytes(blob))
+    return sketch
+
+
+active_users = ActiveUserSketches(settings.active_users.precision)
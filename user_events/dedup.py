@@ -0,0 +1,91 @@
+import hashlib
+import math
+import time
+
+from config.settings import settings
+from observability.metrics import EVENT_DEDUP_FILTER_BYTES
+
+
+def event_digest(user_id, event_name, timestamp):
+    """Hash de 128 bits que identifica un evento; se guarda en user_events.dedup_hash."""
+    key = "\x1f".join((user_id, event_name, timestamp)).encode()
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+class BloomFilter:
+    """Bloom filter de `size` bits y `hashes` funciones sobre un digest de 128 bits.
+
+    Las posiciones salen de las dos mitades del digest (double hashing), sin
+    volver a hashear.
+    """
+
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class WindowedBloomFilter:
+    """Eventos vistos en los últimos `window` a 2 * `window` segundos.
+
+    Se guardan dos generaciones: la actual recibe los eventos nuevos y la
+    anterior solo se consulta. Al cumplirse la ventana la actual pasa a ser la
+    anterior y se empieza una vacía, así la memoria queda fija en dos filtros
+    dimensionados para `expected_items` por ventana con `false_positive_rate`.
+    """
+
+    def __init__(self, expected_items, false_positive_rate, window):
+        self.size = math.ceil(
+            -expected_items * math.log(false_positive_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / expected_items * math.log(2)))
+        self.window = window
+        self.current = BloomFilter(self.size, self.hashes)
+        self.previous = BloomFilter(self.size, self.hashes)
+        self.rotated_at = time.monotonic()
+        EVENT_DEDUP_FILTER_BYTES.set(self.memory_bytes)
+
+    @property
+    def memory_bytes(self):
+        return len(self.current.bits) + len(self.previous.bits)
+
+    def _rotate(self):
+        now = time.monotonic()
+        if now - self.rotated_at < self.window:
+            return
+        # Si pasaron dos ventanas sin eventos, la anterior tampoco sirve
+        self.previous = (
+            self.current
+            if now - self.rotated_at < 2 * self.window
+            else BloomFilter(self.size, self.hashes)
+        )
+        self.current = BloomFilter(self.size, self.hashes)
+        self.rotated_at = now
+
+    def might_contain(self, digest):
+        """False: seguro que no se vio; True: probablemente se vio (hay que confirmarlo)."""
+        self._rotate()
+        return digest in self.current or digest in self.previous
+
+    def add(self, digest):
+        self._rotate()
+        self.current.add(digest)
+
+
+event_filter = WindowedBloomFilter(
+    settings.event_dedup.expected_events,
+    settings.event_dedup.false_positive_rate,
+    settings.event_dedup.window_seconds,
+)
@@ -1,7 +1,6 @@
 from db.database import Base
-from sqlalchemy import Column, ForeignKey, Integer, String 
+from sqlalchemy import Column, ForeignKey, Index, Integer, LargeBinary, String
 from sqlalchemy.orm import relationship
-from datetime import datetime
 
 
 class UserEvent(Base):
@@ -10,7 +9,17 @@ class UserEvent(Base):
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     event_name = Column(String, nullable=False)
     timestamp = Column(String, nullable=False)
+    # blake2b de (user_id, event_name, timestamp); NULL en filas anteriores a la deduplicación
+    dedup_hash = Column(LargeBinary, nullable=True)
 
   # Relación inversa hacia el modelo User
     user = relationship("User", back_populates="events")
-    
\ No newline at end of file
+
+    # Eventos recientes de un usuario (GET /users/{user_id}/state)
+    __table_args__ = (
+        Index("ix_user_events_user_id_id", "user_id", "id"),
+        # Un reintento del cliente no puede insertar el mismo evento dos veces
+        Index("ux_user_events_dedup_hash", "dedup_hash", unique=True),
+        # Purga de eventos viejos en lotes (scheduler.jobs.purge_old_events)
+        Index("ix_user_events_timestamp", "timestamp"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String
+from sqlalchemy import Column, Index, Integer, ForeignKey, String
 from sqlalchemy.orm import relationship
 from db.database import Base
 
@@ -12,5 +12,8 @@ class UserResource(Base):
     gold = Column(Integer, default=0)
     wood = Column(Integer, default=0)
     stone = Column(Integer, default=0)
+    experience = Column(Integer, default=0)
 
     user = relationship("User", back_populates="resources")
+
+    __table_args__ = (Index("ix_user_resources_user_id", "user_id"),)
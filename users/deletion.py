@@ -0,0 +1,265 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+import users.deletion_job  # noqa: F401  (create_all crea user_deletion_jobs)
+from config.settings import settings
+from db.database import connect
+from db.statements import statements
+
+logger = logging.getLogger(__name__)
+
+# Tablas que se vacían en lotes, en este orden; al final se borra el usuario
+PURGE_TABLES = ("user_events", "user_mission_progress", "daily_login_bonus", "user_resources")
+
+JOB_COLUMNS = (
+    "id, user_id, status, current_table, deleted_rows, attempts, last_error, "
+    "next_attempt_at, created_at, updated_at, finished_at"
+)
+
+statements.register(
+    "user_deletion.deactivate",
+    "UPDATE users SET deleted_at = CURRENT_TIMESTAMP WHERE id = :user_id AND deleted_at IS NULL",
+)
+statements.register(
+    "user_deletion.enqueue",
+    f"INSERT INTO user_deletion_jobs (user_id) VALUES (:user_id) RETURNING {JOB_COLUMNS}",
+)
+statements.register(
+    "user_deletion.latest",
+    f"""
+    SELECT {JOB_COLUMNS}
+    FROM user_deletion_jobs
+    WHERE user_id = :user_id
+    ORDER BY id DESC
+    LIMIT 1
+    """,
+)
+# Toma el próximo job pendiente cuyo reintento ya venció, o uno en curso
+# cuyo worker dejó de avanzar.
+# La condición se repite afuera: si dos workers eligen el mismo job, el
+# segundo la reevalúa tras el lock de fila y no actualiza nada
+statements.register(
+    "user_deletion.claim",
+    """
+    UPDATE user_deletion_jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM user_deletion_jobs
+        WHERE (status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= :now))
+           OR (status = 'running' AND updated_at < :stale_before)
+        ORDER BY id
+        LIMIT 1
+    )
+    AND (
+        (status = 'pending' AND (next_attempt_at IS NULL OR next_attempt_at <= :now))
+        OR (status = 'running' AND updated_at < :stale_before)
+    )
+    RETURNING id, user_id, attempts
+    """,
+)
+statements.register(
+    "user_deletion.progress",
+    """
+    UPDATE user_deletion_jobs
+    SET deleted_rows = deleted_rows + :rows,
+        current_table = :table,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = :id
+    """,
+)
+statements.register(
+    "user_deletion.delete_user",
+    "DELETE FROM users WHERE id = :user_id AND deleted_at IS NOT NULL",
+)
+statements.register(
+    "user_deletion.finish",
+    """
+    UPDATE user_deletion_jobs
+    SET status = 'done',
+        current_table = NULL,
+        last_error = NULL,
+        updated_at = CURRENT_TIMESTAMP,
+        finished_at = CURRENT_TIMESTAMP
+    WHERE id = :id
+    """,
+)
+statements.register(
+    "user_deletion.fail",
+    """
+    UPDATE user_deletion_jobs
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+        last_error = :error,
+        next_attempt_at = :next_attempt_at,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = :id
+    """,
+)
+for table in PURGE_TABLES:
+    # Cada lote se busca por el índice de user_id y se borra por clave primaria
+    statements.register(
+        f"user_deletion.purge.{table}",
+        f"""
+        DELETE FROM {table}
+        WHERE id IN (
+            SELECT id FROM {table} WHERE user_id = :user_id LIMIT :batch_size
+        )
+        """,
+    )
+
+
+async def request_user_deletion(con, user_id):
+    """Da de baja al usuario y encola el borrado de sus datos en la transacción de `con`.
+
+    Devuelve la fila del job, o None si el usuario no existe o ya estaba dado de baja.
+    """
+    result = await statements.execute(con, "user_deletion.deactivate", {"user_id": user_id})
+    if result.rowcount == 0:
+        return None
+    return (
+        await statements.execute(con, "user_deletion.enqueue", {"user_id": user_id})
+    ).fetchone()
+
+
+async def latest_deletion_job(con, user_id):
+    return (
+        await statements.execute(con, "user_deletion.latest", {"user_id": user_id})
+    ).fetchone()
+
+
+class UserDeletionWorker:
+    """Tarea en segundo plano que ejecuta los jobs de user_deletion_jobs.
+
+    Cada lote borra como mucho `batch_size` filas en su propia transacción y
+    entre lotes se espera `batch_pause` segundos, así el borrado de un jugador
+    con millones de eventos no retiene locks ni genera una ráfaga de WAL. Varios
+    workers pueden correr a la vez: cada job lo toma uno solo.
+    """
+
+    def __init__(
+        self, batch_size, batch_pause, poll_interval, stale_after, max_attempts,
+        retry_backoff, max_retry_backoff,
+    ):
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._task = None
+        self._wake = None
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def wake(self):
+        """Avisa que hay un job nuevo, sin esperar al próximo sondeo."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                job = await self.claim()
+            except Exception as e:
+                logger.warning("Could not claim a user deletion job: %s", e)
+                job = None
+            if job is None:
+                await self._idle()
+            else:
+                await self.run_job(job)
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def claim(self):
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=self.stale_after)
+        async with connect("writes") as con:
+            job = (
+                await statements.execute(
+                    con, "user_deletion.claim", {"now": now, "stale_before": stale_before}
+                )
+            ).fetchone()
+            await con.commit()
+        return job
+
+    async def run_job(self, job):
+        try:
+            await self.purge(job)
+        except Exception as e:
+            logger.warning("User deletion job %s failed (attempt %s): %s", job.id, job.attempts, e)
+            try:
+                async with connect("writes") as con:
+                    await statements.execute(
+                        con,
+                        "user_deletion.fail",
+                        {
+                            "id": job.id,
+                            "error": str(e),
+                            "max_attempts": self.max_attempts,
+                            "next_attempt_at": self.next_attempt_at(job.attempts),
+                        },
+                    )
+                    await con.commit()
+            except Exception:
+                # Queda en running y se retoma cuando pase stale_after
+                logger.exception("Could not record the failure of job %s", job.id)
+
+    def next_attempt_at(self, attempts):
+        """Backoff exponencial: un error persistente no agota los intentos en segundos."""
+        delay = min(self.retry_backoff * 2 ** max(attempts - 1, 0), self.max_retry_backoff)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    async def purge(self, job):
+        for table in PURGE_TABLES:
+            while True:
+                async with connect("writes") as con:
+                    deleted = (
+                        await statements.execute(
+                            con,
+                            f"user_deletion.purge.{table}",
+                            {"user_id": job.user_id, "batch_size": self.batch_size},
+                        )
+                    ).rowcount
+                    # El avance se guarda en la misma transacción que el lote
+                    await statements.execute(
+                        con,
+                        "user_deletion.progress",
+                        {"id": job.id, "rows": deleted, "table": table},
+                    )
+                    await con.commit()
+                if deleted < self.batch_size:
+                    break
+                await asyncio.sleep(self.batch_pause)
+
+        # Ya sin filas dependientes, el CASCADE del usuario no tiene nada que borrar
+        async with connect("writes") as con:
+            await statements.execute(con, "user_deletion.delete_user", {"user_id": job.user_id})
+            await statements.execute(con, "user_deletion.finish", {"id": job.id})
+            await con.commit()
+
+
+deletion_worker = UserDeletionWorker(
+    settings.user_deletion.batch_size,
+    settings.user_deletion.batch_pause_seconds,
+    settings.user_deletion.poll_interval_seconds,
+    settings.user_deletion.stale_after_seconds,
+    settings.user_deletion.max_attempts,
+    settings.user_deletion.retry_backoff_seconds,
+    settings.user_deletion.max_retry_backoff_seconds,
+)
@@ -0,0 +1,24 @@
+from db.database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+
+
+class UserDeletionJob(Base):
+    __tablename__ = "user_deletion_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Sin FK: el job tiene que sobrevivir al borrado del usuario
+    user_id = Column(String, nullable=False, index=True)
+    # pending, running, done o failed
+    status = Column(String, nullable=False, server_default="pending")
+    current_table = Column(String, nullable=True)
+    deleted_rows = Column(Integer, nullable=False, server_default="0")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(String, nullable=True)
+    # Tras un fallo, el job no se vuelve a tomar antes de este instante
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Los workers buscan el próximo job pendiente por este índice
+    __table_args__ = (Index("ix_user_deletion_jobs_status_id", "status", "id"),)
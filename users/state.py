@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+from db.statements import statements
+
+# Máximo de eventos recientes que se pueden pedir con ?events=
+MAX_STATE_EVENTS = 50
+
+# Columnas de cada sección de GET /users/{user_id}/state y el JOIN que la trae
+STATE_SECTIONS = {
+    "user": ("u.name, u.email, u.registerdatetime", ""),
+    "resources": (
+        "r.food, r.gold, r.wood, r.stone, r.experience",
+        "LEFT JOIN user_resources r ON r.user_id = u.id",
+    ),
+    "daily_bonus": (
+        "b.last_login_date, b.streak",
+        "LEFT JOIN daily_login_bonus b ON b.user_id = u.id",
+    ),
+    # Una fila por evento reciente; las columnas de las demás secciones se repiten
+    "recent_events": (
+        "ev.id AS event_id, ev.event_name, ev.timestamp AS event_timestamp",
+        """LEFT JOIN (
+            SELECT id, user_id, event_name, timestamp
+            FROM user_events
+            WHERE user_id = :user_id
+            ORDER BY id DESC
+            LIMIT :events_limit
+        ) ev ON ev.user_id = u.id""",
+    ),
+}
+
+
+def state_statement(sections):
+    """Nombre de la sentencia que trae `sections` en un solo viaje a la base."""
+    key = ",".join(section for section in STATE_SECTIONS if section in sections)
+
+    def build():
+        columns = ["u.id"]
+        joins = []
+        for section in STATE_SECTIONS:
+            if section in sections:
+                columns.append(STATE_SECTIONS[section][0])
+                if STATE_SECTIONS[section][1]:
+                    joins.append(STATE_SECTIONS[section][1])
+        order = " ORDER BY ev.id DESC" if "recent_events" in sections else ""
+        return (
+            f"SELECT {', '.join(columns)} FROM users u {' '.join(joins)} "
+            f"WHERE u.id = :user_id AND u.deleted_at IS NULL{order}"
+        )
+
+    return statements.variant("users.state", key, build)
+
+
+def to_date(value):
+    """last_login_date llega como date (asyncpg) o como texto (SQLite)."""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def bonus_status(last_login_date, streak, today):
+    """Si el bono de hoy se puede reclamar y con qué racha quedaría."""
+    last_login_date = to_date(last_login_date)
+    if last_login_date is None:
+        return {"claimable": True, "next_streak": 1}
+    if last_login_date == today:
+        return {"claimable": False, "next_streak": streak}
+    if last_login_date == today - timedelta(days=1):
+        return {"claimable": True, "next_streak": streak + 1}
+    return {"claimable": True, "next_streak": 1}
+
+
+def player_state(rows, sections, today):
+    """Arma la respuesta a partir de las filas de state_statement()."""
+    first = rows[0]
+    state = {}
+    if "user" in sections:
+        state["user"] = {
+            "id": first.id,
+            "name": first.name,
+            "email": first.email,
+            "registerdatetime": first.registerdatetime,
+        }
+    if "resources" in sections:
+        state["resources"] = (
+            None
+            if first.food is None
+            else {
+                "food": first.food,
+                "gold": first.gold,
+                "wood": first.wood,
+                "stone": first.stone,
+                "experience": first.experience,
+            }
+        )
+    if "daily_bonus" in sections:
+        streak = first.streak or 0
+        state["daily_bonus"] = {
+            "last_login_date": to_date(first.last_login_date),
+            "streak": streak,
+            **bonus_status(first.last_login_date, streak, today),
+        }
+    if "recent_events" in sections:
+        events = {}
+        for row in rows:
+            # Sin evento, la fila del LEFT JOIN trae event_id NULL
+            if row.event_id is not None and row.event_id not in events:
+                events[row.event_id] = {
+                    "id": row.event_id,
+                    "event_name": row.event_name,
+                    "timestamp": row.event_timestamp,
+                }
+        state["recent_events"] = list(events.values())
+    return state
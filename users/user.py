@@ -1,5 +1,5 @@
 from db.database import Base
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, DateTime, String, func
 from sqlalchemy.orm import relationship
 
 
@@ -11,6 +11,10 @@ class User(Base):
     email = Column(String, nullable=False)
     password = Column(String, nullable=False)
     registerdatetime = Column(String, nullable=False)
+    # Lo actualiza un trigger en cada UPDATE; de aquí salen ETag y Last-Modified
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Marca de baja: el usuario ya no existe para la API mientras un job borra sus datos
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relación con eventos (uno-a-muchos)
     # Propósito: Rastrear todos los eventos generados por el usuario (como clics, acciones, etc.).